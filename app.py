@@ -1,17 +1,33 @@
 import os
 import logging
+import sqlite3
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s %(name)s %(message)s')
 
 class Base(DeclarativeBase):
     pass
 
 db = SQLAlchemy(model_class=Base)
 
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragma(dbapi_conn, _):
+    """Use WAL with relaxed syncing so status updates from workers don't block readers or fsync per commit"""
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 # Create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
@@ -34,6 +50,13 @@ if replit_domain:
 else:
     app.config["YOUTUBE_REDIRECT_URI"] = os.environ.get("YOUTUBE_REDIRECT_URI", "http://localhost:5000/youtube/callback")
 
+# Generated shorts are only ever served from this directory
+app.config["OUTPUTS_DIR"] = os.path.abspath('outputs')
+
+# Let the front-end server send generated shorts: nginx via an internal X-Accel-Redirect location, Apache via X-Sendfile
+app.config["ACCEL_REDIRECT_PREFIX"] = os.environ.get("ACCEL_REDIRECT_PREFIX")
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
 # Initialize the app with the extension
 db.init_app(app)
 
@@ -84,7 +107,16 @@ if __name__ == '__main__':
     with app.app_context():
         db.create_all()
 
+    # Uploads interrupted by the last shutdown can be retried once they are marked failed
+    from datetime import timedelta
+    from youtube_uploader import fail_abandoned_uploads
+    fail_abandoned_uploads(older_than=timedelta(0))
+    routes.fail_interrupted_jobs()
+
     # Start keep-alive service
     keep_alive_service.start()
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    try:
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    finally:
+        routes.shutdown_job_executor()
\ No newline at end of file
@@ -1,32 +1,553 @@
+import asyncio
+import functools
+import hashlib
 import json
 import logging
+import mmap
 import os
+import re
+import sqlite3
+import string
+import threading
+import time
+from collections import Counter, OrderedDict
 from google import genai
-from google.genai import types
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from google.genai import errors, types
+from pydantic import BaseModel, Field, TypeAdapter, ValidationInfo, field_validator
+from typing import List, Dict, Any, Tuple
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional, the stdlib parser is just slower
+    _json_loads = json.loads
 
 class SegmentAnalysis(BaseModel):
-    engagement_score: float
-    emotion_score: float
-    viral_potential: float
-    quotability: float
-    emotions: List[str]
-    keywords: List[str]
-    reason: str
+    engagement_score: float = Field(ge=0.0, le=1.0)
+    emotion_score: float = Field(ge=0.0, le=1.0)
+    viral_potential: float = Field(ge=0.0, le=1.0)
+    quotability: float = Field(ge=0.0, le=1.0)
+    emotions: List[str] = Field(max_length=5)
+    keywords: List[str] = Field(max_length=10)
+    reason: str = Field(max_length=500)
+
+    @field_validator('engagement_score', 'emotion_score', 'viral_potential', 'quotability', mode='before')
+    @classmethod
+    def _clamp_score(cls, value):
+        """Clamp out-of-range scores instead of rejecting the analysis"""
+        if isinstance(value, (int, float)):
+            return max(0.0, min(1.0, value))
+        return value
+
+    @field_validator('emotions', 'keywords', 'reason', mode='before')
+    @classmethod
+    def _truncate(cls, value, info: ValidationInfo):
+        """Trim over-long values to the field's max_length instead of rejecting them"""
+        limits = [m.max_length for m in cls.model_fields[info.field_name].metadata if hasattr(m, 'max_length')]
+        return value[:limits[0]] if limits and isinstance(value, (list, str)) else value
 
 class VideoMetadata(BaseModel):
     title: str
     description: str
     tags: List[str]
 
+# Validates the JSON array returned when several segments share one request
+_SEGMENT_LIST = TypeAdapter(List[SegmentAnalysis])
+
+# Gemini error classification: out of quota on this key, or worth retrying later
+_QUOTA_RE = re.compile(r"429|resource_exhausted|quota|rate[ _]?limit", re.IGNORECASE)
+_OVERLOAD_RE = re.compile(r"429|503|resource_exhausted|quota|rate[ _]?limit|overloaded|unavailable", re.IGNORECASE)
+
+# Fallback analysis keyword categories, matched against the segment's word set
+_ENGAGEMENT_KEYWORDS = frozenset({'amazing', 'incredible', 'wow', 'shocking', 'unbelievable', 'funny', 'hilarious',
+                                  'awesome', 'fantastic', 'mind-blowing', 'crazy', 'insane', 'epic', 'legendary'})
+_EMOTION_KEYWORDS = frozenset({'love', 'hate', 'excited', 'surprised', 'happy', 'angry', 'scared', 'thrilled',
+                               'disappointed', 'frustrated', 'overwhelmed', 'passionate', 'emotional', 'heartwarming'})
+_VIRAL_KEYWORDS = frozenset({'viral', 'trending', 'share', 'like', 'subscribe', 'follow', 'must-see', 'breaking',
+                             'exclusive', 'revealed', 'secret', 'exposed', 'truth', 'shocking'})
+_QUOTABLE_KEYWORDS = frozenset({'said', 'quote', 'tells', 'explains', 'reveals', 'admits', 'confesses', 'announces'})
+
+# Emotion labels and the words that trigger them, in reporting order
+_EMOTION_TRIGGERS = (
+    ('humor', frozenset({'funny', 'hilarious', 'joke', 'laugh'})),
+    ('surprise', frozenset({'shocking', 'surprised', 'unexpected'})),
+    ('inspiration', frozenset({'love', 'heartwarming', 'beautiful'})),
+    ('controversy', frozenset({'angry', 'frustrated', 'hate'})),
+)
+
+def _build_keyword_index() -> Dict[str, Tuple[str, ...]]:
+    """Map every fallback keyword to the score categories and emotion labels it counts towards"""
+    groups = (
+        ('engagement', _ENGAGEMENT_KEYWORDS),
+        ('emotion', _EMOTION_KEYWORDS),
+        ('viral', _VIRAL_KEYWORDS),
+        ('quotable', _QUOTABLE_KEYWORDS),
+    ) + _EMOTION_TRIGGERS
+    index = {}
+    for label, words in groups:
+        for word in words:
+            index[word] = index.get(word, ()) + (label,)
+    return index
+
+_KEYWORD_INDEX = _build_keyword_index()
+_FALLBACK_KEYWORDS = frozenset(_KEYWORD_INDEX)
+
+def _truncate_tags(tags, limit: int = 500) -> List[str]:
+    """Keep the leading tags whose comma-separated length stays within limit characters"""
+    if len(', '.join(tags)) <= limit:
+        return list(tags)
+
+    truncated_tags = []
+    current_length = 0
+    for tag in tags:
+        if current_length + len(tag) + 2 <= limit:  # +2 for comma and space
+            truncated_tags.append(tag)
+            current_length += len(tag) + 2
+        else:
+            break
+    return truncated_tags
+
+# 28 default viral tags, plus the prefix that fits YouTube's 500 character tag budget
+_DEFAULT_VIRAL_TAGS = (
+    'shorts', 'viral', 'trending', 'mustsee', 'amazing', 'incredible', 'shocking', 'unbelievable',
+    'funny', 'hilarious', 'entertainment', 'comedy', 'emotional', 'heartwarming', 'inspiring',
+    'motivation', 'lifestyle', 'relatable', 'authentic', 'genuine', 'raw', 'real', 'moments',
+    'reactions', 'vibes', 'mood', 'content', 'creator'
+)
+_DEFAULT_VIRAL_TAGS_TRUNCATED = tuple(_truncate_tags(_DEFAULT_VIRAL_TAGS))
+
+# Emojis used to decorate fallback descriptions, by content theme
+_EMOJI_SETS = {
+    "humor": ("😂", "🤣", "😆", "😄", "🙃", "😁", "😊"),
+    "shock": ("😱", "🤯", "😲", "🫨", "😵", "🤐", "😳"),
+    "amazing": ("🔥", "✨", "⭐", "💫", "🌟", "💥", "🚀"),
+    "secret": ("🤫", "👀", "🕵️", "🔍", "💭", "🤔", "😏"),
+    "music": ("🎵", "🎶", "🎤", "🎸", "🎹", "🥁", "🎺"),
+    "general": ("🔥", "😍", "🤩", "💯", "👏", "🙌", "✨"),
+}
+
+# Fallback title themes in priority order: (emoji theme, title template, trigger words)
+_TITLE_THEME_TRIGGERS = (
+    ("humor", "😂 HILARIOUS: {key_words} - You Won't Stop Laughing! 🤣 #Shorts #Viral",
+     ('funny', 'hilarious', 'joke', 'laugh')),
+    ("shock", "😱 SHOCKING: {key_words} - This Will Blow Your Mind! 🤯 #Shorts #Viral",
+     ('shocking', 'unbelievable', 'incredible', 'insane')),
+    ("amazing", "🔥 AMAZING: {key_words} - Absolutely Incredible! ✨ #Shorts #Viral",
+     ('amazing', 'awesome', 'fantastic', 'incredible')),
+    ("secret", "🤫 REVEALED: {key_words} - The Truth Exposed! 😲 #Shorts #Viral",
+     ('secret', 'revealed', 'truth', 'hidden')),
+    ("music", "🎵 VIRAL MUSIC: {key_words} - This Hit Different! 🎶 #Shorts #Viral",
+     ('music', 'song', 'dance', 'singing')),
+)
+_TITLE_THEMES = tuple((theme, template) for theme, template, _ in _TITLE_THEME_TRIGGERS)
+_GENERAL_THEME = ("general", "🔥 VIRAL: {key_words} - Must See This! 😍 #Shorts #Viral")
+
+# Trigger word -> index of the first theme it belongs to, so 'incredible' keeps picking shock over amazing
+_THEME_WORDS = {}
+for _priority, (_, _, _words) in enumerate(_TITLE_THEME_TRIGGERS):
+    for _word in _words:
+        _THEME_WORDS.setdefault(_word, _priority)
+
+# Long fallback description; {e0}..{e6} are the theme's emojis
+_DESCRIPTION_TEMPLATE = """🚨 VIRAL ALERT! {e0} This moment from "{original_title}" is absolutely INSANE and you NEED to see it! {e1}
+
+{e2} WHAT JUST HAPPENED?! {e2}
+This clip is breaking the internet right now and for good reason! The moment captured here is pure gold - the kind of content that makes you stop scrolling and watch it 10 times in a row! {e3} I've been creating content for years, and moments like this remind me why I fell in love with sharing authentic experiences with the world.
+
+💭 THE STORY BEHIND THIS VIRAL MOMENT:
+This incredible segment comes from the amazing video "{original_title}" and let me tell you, when this part hit, the comments section went WILD! {e4} People are sharing this everywhere - Twitter, TikTok, Instagram, you name it! The original video has been gaining massive traction, but this particular moment? It's the crown jewel that everyone's talking about.
+
+🎬 WHAT MAKES THIS SO SPECIAL:
+"{segment_snippet}..." - Just reading this gives you chills, right? {e5} The way this moment unfolds is absolutely perfect. It's got everything - emotion, authenticity, and that special something that makes content go viral! You can feel the raw energy, the genuine emotion, and the perfect timing that makes this clip so incredibly shareable.
+
+🌟 WHY EVERYONE'S TALKING ABOUT IT:
+✅ Pure, unfiltered emotion that hits different
+✅ The timing is absolutely perfect
+✅ Relatable content that speaks to everyone
+✅ That "main character energy" we all love
+✅ Perfect for sharing with friends and family
+✅ Authentic moments that can't be scripted
+✅ The kind of content that makes you feel something real
+✅ Universal appeal that crosses all boundaries
+
+🔥 COMMUNITY REACTIONS:
+The comments are going CRAZY! {e6} People are saying things like "This is why I love the internet", "I can't stop watching this", and "This made my whole day!" The way this resonates with people is incredible! We're seeing reactions from all over the world - people sharing their own similar experiences, relating to the emotions, and connecting with the authenticity of this moment.
+
+💡 BEHIND THE SCENES:
+What makes this even more special is the context. This isn't scripted or planned - it's pure, authentic content that just happened to be caught on camera. That's the magic of real moments! {e0} In a world full of manufactured content, finding genuine moments like this is like discovering treasure. The spontaneity, the real emotions, the unfiltered reactions - this is what makes content truly viral.
+
+🎯 JOIN THE CONVERSATION:
+👍 SMASH that like button if this gave you chills!
+🔔 Subscribe for more viral moments like this!
+💬 Comment below - what was your reaction when you first saw this?
+📤 Share this with someone who needs to see it!
+🔄 Save this for when you need a pick-me-up!
+🎥 Tag a friend who would love this content!
+💫 Let us know what other moments you'd like to see!
+
+🏷️ TRENDING NOW:
+This clip is part of a growing trend of authentic, unfiltered content that's taking over social media. We're living in the golden age of real moments being captured and shared! {e1} The algorithm is rewarding genuine content, and creators are finally understanding that authenticity beats perfection every single time.
+
+📈 THE VIRAL FACTOR:
+What makes content go viral? It's moments like these - unexpected, genuine, and emotionally resonant. This clip has all the elements: perfect timing, authentic emotion, and that indefinable quality that makes you want to share it immediately! The engagement metrics are through the roof, with views, likes, and shares climbing by the minute.
+
+🌍 GLOBAL IMPACT:
+People from all over the world are connecting with this moment. It doesn't matter what language you speak or where you're from - good content is universal! {e2} We're seeing reactions from every continent, proving that authentic human experiences transcend cultural boundaries.
+
+🎉 MORE AMAZING CONTENT:
+If you loved this clip, you're going to OBSESS over our other videos! We're constantly finding and sharing the most incredible, viral-worthy moments from across the internet. This is just the beginning! {e3} Our content library is packed with moments that will make you laugh, cry, think, and feel inspired.
+
+💬 COMMUNITY ENGAGEMENT:
+What do you think makes this moment so special? Drop your thoughts in the comments! {e4} We love hearing from our community and your perspectives always add so much value to these conversations. Some of the best insights come from you - our incredible viewers who bring unique perspectives to every piece of content we share.
+
+🎭 THE EMOTIONAL JOURNEY:
+This clip takes you on an emotional rollercoaster that's impossible to ignore. From the initial surprise to the building tension, and finally to that perfect climactic moment - it's a masterclass in storytelling without even trying to be one! {e5} The natural progression of emotions keeps you hooked from start to finish.
+
+🌟 INSPIRATION CORNER:
+Moments like this remind us why we create content in the first place. It's not just about views or likes - it's about creating connections, sharing experiences, and bringing people together through the power of storytelling. {e6} Every time we witness genuine human moments like this, it reinforces our belief in the power of authentic content.
+
+⚡ FINAL THOUGHTS:
+In a world full of content, this moment stands out. It's real, it's powerful, and it's exactly what we need more of. Thank you for being part of this incredible community that celebrates authentic human moments! {e0} Your support means everything to us, and it's what keeps us motivated to find and share these amazing moments with the world.
+
+🙏 Don't forget to show some love - your engagement helps us find and share more amazing content like this! Every like, comment, and share makes a difference and helps us reach more people who need to see these incredible moments! {e1}
+
+📢 CALL TO ACTION:
+Ready to see more content like this? Hit that subscribe button and turn on notifications so you never miss a viral moment! Share this with your friends, family, and anyone who appreciates authentic, incredible content. Let's build a community of people who celebrate real moments and genuine human experiences! {e2}
+
+#Shorts #Viral #Trending #MustWatch #Authentic #RealMoments #ViralVideo #ShareThis #Amazing #Incredible #SocialMedia #Funny #Emotional #Heartwarming #Inspiring #Entertainment #PopCulture #Internet #Community #Reactions #Mood #Vibes #Content #Creator #YouTube #TikTok #Instagram #Twitter #Share #Like #Subscribe #Comment #Save #Repost #Trending2024 #ViralContent #MustSee #Epic #Legendary #Unforgettable #Perfect #Timing #Genuine #Unfiltered #Raw #Authentic #Beautiful #Powerful #Moving #Touching #Hilarious #Shocking #Unbelievable #Incredible #Outstanding #Phenomenal #Extraordinary #Remarkable #Sensational #Spectacular #Breathtaking #Mindblowing #Gamechanging #Revolutionary #Engaging #Captivating #Compelling #Mesmerizing #Addictive #Shareable #Relatable #Universal #Timeless #Memorable"""
+
+@functools.lru_cache(maxsize=256)
+def _tokenize(text: str) -> Tuple[Tuple[str, ...], frozenset]:
+    """Split a segment once into (words, normalized word set) for all fallback helpers"""
+    words = tuple(text.split())
+    tokens = frozenset(word.strip(string.punctuation).lower() for word in words)
+    return words, tokens
+
+@functools.lru_cache(maxsize=2048)
+def _fallback_analysis_result(text: str) -> Tuple:
+    """Keyword-based segment scores as an immutable tuple, memoized across analyzer instances"""
+    words, tokens = _tokenize(text)
+
+    # Count every category and emotion label from a single lookup of the matched keywords
+    counts = Counter()
+    for word in tokens & _FALLBACK_KEYWORDS:
+        counts.update(_KEYWORD_INDEX[word])
+
+    # Calculate scores based on keyword presence
+    engagement_score = min(1.0, counts['engagement'] * 0.15)
+    emotion_score = min(1.0, counts['emotion'] * 0.15)
+    viral_score = min(1.0, counts['viral'] * 0.2)
+    quotability_score = min(1.0, counts['quotable'] * 0.2)
+
+    # Length-based scoring (optimal length for shorts)
+    text_length = len(words)
+    if 20 <= text_length <= 50:  # Optimal length for short clips
+        length_bonus = 0.2
+    elif 10 <= text_length <= 80:  # Good length
+        length_bonus = 0.1
+    else:
+        length_bonus = 0.0
+
+    # Add length bonus to all scores
+    engagement_score = min(1.0, engagement_score + length_bonus)
+    emotion_score = min(1.0, emotion_score + length_bonus)
+    viral_score = min(1.0, viral_score + length_bonus)
+    quotability_score = min(1.0, quotability_score + length_bonus)
+
+    # Ensure minimum scores for content viability
+    engagement_score = max(0.4, engagement_score)
+    emotion_score = max(0.3, emotion_score)
+    viral_score = max(0.3, viral_score)
+    quotability_score = max(0.2, quotability_score)
+
+    # Detect emotions based on keywords
+    detected_emotions = [emotion for emotion, _ in _EMOTION_TRIGGERS if counts[emotion]]
+    if not detected_emotions:
+        detected_emotions = ['general']
+
+    # Extract meaningful keywords (longer words, excluding common words)
+    common_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'a', 'an'}
+    keywords = [word for word in words if len(word) > 3 and word.lower() not in common_words][:8]
+
+    return (
+        engagement_score,
+        emotion_score,
+        viral_score,
+        quotability_score,
+        tuple(detected_emotions[:5]),
+        tuple(keywords),
+        f'Fallback analysis: {len(words)} words, detected {", ".join(detected_emotions)} content'
+    )
+
+def _create_long_description(segment_text: str, original_title: str, emoji_theme: str = "general") -> str:
+    """Create a long viral description with emojis and hashtags (1500+ words)"""
+    # Choose emojis based on theme
+    emojis = _EMOJI_SETS.get(emoji_theme, _EMOJI_SETS["general"])
+
+    mapping = {f"e{i}": emoji for i, emoji in enumerate(emojis)}
+    return _DESCRIPTION_TEMPLATE.format_map({
+        **mapping,
+        'original_title': original_title,
+        'segment_snippet': segment_text[:300],
+    })
+
+@functools.lru_cache(maxsize=512)
+def _fallback_metadata_result(segment_text: str, original_title: str, language: str) -> Tuple[str, str]:
+    """Fallback (title, description) pair, memoized across analyzer instances"""
+    words, tokens = _tokenize(segment_text)
+
+    # Extract meaningful keywords (exclude common words)
+    common_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'a', 'an', 'this', 'that'}
+    key_words = [word for word in words if len(word) > 3 and word.lower() not in common_words][:5]
+
+    # Generate viral title with emojis and hashtags based on content type, highest-priority theme wins
+    matched = [_THEME_WORDS[token] for token in tokens if token in _THEME_WORDS]
+    emoji_theme, template = _TITLE_THEMES[min(matched)] if matched else _GENERAL_THEME
+    title = template.format(key_words=' '.join(key_words[:2]))
+
+    # Limit title to 100 characters
+    title = title[:100]
+
+    # Generate long viral description (1500+ words)
+    description = _create_long_description(segment_text, original_title, emoji_theme)
+
+    return title, description
+
+def _file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file, hashed straight from the page cache through mmap"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap can't map an empty file
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+
+class _ResponseCache:
+    """LRU in-memory cache backed by a sqlite table for Gemini responses"""
+
+    # Entries are held as encoded JSON and decoded per hit, so callers that modify a result never change the cache
+
+    # How often set() deletes expired rows from the disk store
+    PURGE_INTERVAL = 3600
+
+    def __init__(self, db_path: str, max_entries: int = 500):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One connection per process, opened on first use and shared by every thread under _db_lock
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._next_purge = 0
+
+        try:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            with self._db_lock:
+                self._connection().execute("CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value BLOB, expires_at INT)")
+                self._purge_expired(int(time.time()))
+                # Created at import, which a forking server does in the parent; workers open their own
+                self._conn.close()
+                self._conn = None
+        except sqlite3.Error as e:
+            self.logger.warning("Response cache disk store unavailable, using memory only: %s", e)
+            self.db_path = None
+
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """Forget the parent's connection in a forked child, which opens its own"""
+        self._conn = None
+        self._db_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the open connection to the disk store; callers hold _db_lock"""
+        if self._conn is None:
+            # Autocommit, and WAL with relaxed syncing so a write on the Gemini loop doesn't wait on an fsync
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def _purge_expired(self, now: int):
+        """Delete expired rows, which get() skips but nothing else removes; callers hold _db_lock"""
+        self._connection().execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self._next_purge = now + self.PURGE_INTERVAL
+
+    @staticmethod
+    def make_key(*parts: str) -> bytes:
+        """Build a deterministic key from the model, prompts and input text"""
+        return hashlib.sha256("\0".join(parts).encode('utf-8')).digest()
+
+    def get(self, key: bytes):
+        """Return the cached value for key, or None on miss/expiry"""
+        now = int(time.time())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return _json_loads(value)
+                del self._entries[key]
+
+        if not self.db_path:
+            return None
+
+        try:
+            with self._db_lock:
+                row = self._connection().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            self.logger.warning("Response cache read failed: %s", e)
+            return None
+
+        if not row or row[1] <= now:
+            return None
+
+        self._remember(key, row[0], row[1])
+        return _json_loads(row[0])
+
+    def set(self, key: bytes, value: Dict[str, Any], ttl: int = 86400):
+        """Store value under key for ttl seconds"""
+        now = int(time.time())
+        expires_at = now + ttl
+        data = json.dumps(value).encode('utf-8')
+        self._remember(key, data, expires_at)
+
+        if not self.db_path:
+            return
+
+        try:
+            with self._db_lock:
+                self._connection().execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                                           (key, data, expires_at))
+                if now >= self._next_purge:
+                    self._purge_expired(now)
+        except sqlite3.Error as e:
+            self.logger.warning("Response cache write failed: %s", e)
+
+    def _remember(self, key: bytes, data: bytes, expires_at: int):
+        with self._lock:
+            self._entries[key] = (data, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Shared across analyzer instances so every background job benefits from earlier runs
+_response_cache = _ResponseCache(os.environ.get("GEMINI_CACHE_PATH", os.path.join('instance', 'gemini_cache.db')))
+
+# The genai aio clients keep an HTTP pool bound to the loop that first used it, so every
+# coroutine runs on this one long-lived loop instead of a fresh asyncio.run() loop per call
+_loop = None
+_loop_lock = threading.Lock()
+
+# Longest a caller waits for one sync call (a whole batch included) before giving up on it
+GEMINI_CALL_TIMEOUT = int(os.environ.get("GEMINI_CALL_TIMEOUT", 900))
+
+def _run_on_loop(coro, timeout=GEMINI_CALL_TIMEOUT):
+    """Run a coroutine on the shared background event loop and wait for its result"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            # Started lazily so a forking server creates it in each worker, not in the parent
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="gemini-loop", daemon=True).start()
+    future = asyncio.run_coroutine_threadsafe(coro, _loop)
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        # Cancels the task on the loop too, so an abandoned call stops holding key semaphores
+        future.cancel()
+        raise
+
+# API key -> semaphore capping its in-flight requests across every analyzer in the process; only
+# touched from coroutines on _loop, so a plain dict needs no lock
+_key_semaphores = {}
+
 class GeminiAnalyzer:
+    SEGMENT_SYSTEM_PROMPT = """You are an expert content analyst specializing in viral social media content and YouTube Shorts.
+
+    Analyze the given text segment for its potential to create engaging short-form video content.
+
+    Consider these factors:
+    - Engagement Score (0.0-1.0): How likely this content is to engage viewers
+    - Emotion Score (0.0-1.0): Emotional impact and intensity
+    - Viral Potential (0.0-1.0): Likelihood to be shared and go viral
+    - Quotability (0.0-1.0): How memorable and quotable the content is
+    - Emotions: List of emotions detected (humor, surprise, excitement, inspiration, etc.)
+    - Keywords: Important keywords that make this content engaging
+    - Reason: Brief explanation of why this segment is engaging
+
+    Focus on content that has:
+    - Strong emotional hooks
+    - Surprising or unexpected elements
+    - Humor or entertainment value
+    - Inspirational or motivational content
+    - Controversial or debate-worthy topics
+    - Clear storytelling elements
+    - Quotable phrases or moments"""
+
+    METADATA_SYSTEM_PROMPT = """You are an expert YouTube content creator specializing in viral Shorts. Generate extremely engaging and viral metadata for a YouTube Short based on the content segment and original video title in {language}.
+
+    Guidelines:
+    - Title: Create a viral, clickbait title under 100 characters with relevant emojis and at least 2 hashtags
+    - Description: Write a compelling 1500+ word description with story, context, emotional hooks, call-to-actions, and strategic hashtag placement
+    - Tags: Generate exactly 28 viral, trending tags for maximum discoverability (total under 500 characters)
+
+    VIRAL TITLE REQUIREMENTS:
+    - Use 2-3 relevant emojis that match the content emotion
+    - Include emotional triggers (SHOCKING, INSANE, VIRAL, etc.)
+    - Create curiosity gaps and cliffhangers
+    - Use trending words and phrases
+    - Make it clickable and shareable
+    - Include at least 2 hashtags in title
+    - Keep under 100 characters total
+
+    VIRAL DESCRIPTION REQUIREMENTS:
+    - Start with a hook that grabs attention immediately
+    - Tell a story or provide context about the moment
+    - Include emotional commentary and reactions
+    - Add background information about the original video
+    - Include call-to-actions (like, subscribe, comment, share)
+    - Use trending hashtags strategically throughout
+    - End with engagement questions
+    - Must be at least 1500 words long
+    - Include relevant emojis throughout the description
+    - Create community engagement prompts
+    - Add background context and reactions
+
+    VIRAL TAGS REQUIREMENTS:
+    - Generate exactly 28 tags
+    - Mix broad trending tags with specific niche tags
+    - Include emotion-based tags (funny, shocking, viral, etc.)
+    - Add content category tags
+    - Include current trending tags
+    - Use variations of keywords
+    - Keep total character count under 500 characters"""
+
+    # In-flight requests allowed per key and how long a throttled key rests
+    CONCURRENCY_PER_KEY = 5
+    KEY_COOLDOWN_SECONDS = 60
+    # Pause before the one retry a segment request gets after a transient error
+    RETRY_DELAY_SECONDS = 2
+
+    # How long to wait for an uploaded video to finish server-side processing
+    FILE_PROCESSING_TIMEOUT = 300
+
+    # Gemini deletes uploaded files after 48 hours, so stop reusing a handle an hour before that
+    UPLOADED_FILE_TTL = 47 * 3600
+
+    # Segments sent together in one analysis request by the batch path
+    SEGMENTS_PER_REQUEST = 8
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.client = None
         self.use_fallback_only = False
         self.api_keys = []
         self.current_key_index = 0
+        # One client per API key, built on first use and kept so its connection pool stays warm;
+        # their aio pools only work because every coroutine runs on the shared _loop
+        self.clients = []
 
         # Collect all available API keys
         self._collect_api_keys()
@@ -52,18 +573,24 @@ class GeminiAnalyzer:
             if backup_key:
                 self.api_keys.append(backup_key)
 
-        self.logger.info(f"Found {len(self.api_keys)} Gemini API key(s)")
+        self.logger.info("Found %d Gemini API key(s)", len(self.api_keys))
+        self.clients = [None] * len(self.api_keys)
+
+    def _get_key_client(self, key_index: int) -> genai.Client:
+        """Return the client for an API key, creating it the first time it is needed"""
+        if self.clients[key_index] is None:
+            self.clients[key_index] = genai.Client(api_key=self.api_keys[key_index])
+        return self.clients[key_index]
 
     def _initialize_client(self):
         """Initialize client with current API key"""
         if self.current_key_index < len(self.api_keys):
             try:
-                api_key = self.api_keys[self.current_key_index]
-                self.client = genai.Client(api_key=api_key)
-                self.logger.info(f"Gemini client initialized with API key #{self.current_key_index + 1}")
+                self.client = self._get_key_client(self.current_key_index)
+                self.logger.info("Gemini client initialized with API key #%d", self.current_key_index + 1)
                 return True
             except Exception as e:
-                self.logger.warning(f"Failed to initialize Gemini client with key #{self.current_key_index + 1}: {e}")
+                self.logger.warning("Failed to initialize Gemini client with key #%d: %s", self.current_key_index + 1, e)
                 return False
         return False
 
@@ -71,7 +598,7 @@ class GeminiAnalyzer:
         """Switch to next available API key"""
         self.current_key_index += 1
         if self.current_key_index < len(self.api_keys):
-            self.logger.info(f"Switching to backup API key #{self.current_key_index + 1}")
+            self.logger.info("Switching to backup API key #%d", self.current_key_index + 1)
             if self._initialize_client():
                 return True
 
@@ -81,88 +608,96 @@ class GeminiAnalyzer:
         self.client = None
         return False
 
+    def _is_quota_error(self, error_msg: str) -> bool:
+        """Check whether an error means the current key is out of quota or rate limited"""
+        return _QUOTA_RE.search(error_msg) is not None
+
+    def _is_permanent_error(self, error: Exception) -> bool:
+        """Check whether retrying the same request can never succeed"""
+        # Malformed JSON and schema violations surface as ValueError (json, orjson and pydantic all subclass it)
+        if isinstance(error, (ValueError, TypeError)):
+            return True
+        # INVALID_ARGUMENT means the request itself is wrong; other 4xx codes (404, 429) are handled elsewhere
+        return isinstance(error, errors.ClientError) and error.code == 400
+
     def _handle_api_error(self, error_msg: str):
         """Handle API errors and attempt key switching"""
         # Check for quota exceeded or rate limit errors
-        if any(indicator in error_msg.lower() for indicator in ["429", "resource_exhausted", "quota", "rate limit"]):
-            self.logger.warning(f"API quota/rate limit hit: {error_msg}")
+        if self._is_quota_error(error_msg):
+            self.logger.warning("API quota/rate limit hit: %s", error_msg)
             return self._switch_to_next_key()
 
         # For other errors, log but don't switch keys
-        self.logger.error(f"API error: {error_msg}")
+        self.logger.error("API error: %s", error_msg)
         return False
 
+    def _key_semaphore(self, key_index: int) -> asyncio.Semaphore:
+        """Concurrency limit for one API key, shared by all jobs using that key"""
+        api_key = self.api_keys[key_index]
+        if api_key not in _key_semaphores:
+            _key_semaphores[api_key] = asyncio.Semaphore(self.CONCURRENCY_PER_KEY)
+        return _key_semaphores[api_key]
+
+    def _generation_config(self, system_prompt: str, response_schema) -> types.GenerateContentConfig:
+        """Build a JSON generation config with the system prompt sent inline"""
+        # Both system prompts are far below Gemini's minimum size for explicit context caching
+        return types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+        )
+
     def analyze_segment(self, text: str) -> Dict[str, Any]:
         """Analyze a text segment for engagement and viral potential using Gemini"""
+        return _run_on_loop(self.analyze_segment_async(text))
+
+    async def analyze_segment_async(self, text: str) -> Dict[str, Any]:
+        """Async version of analyze_segment"""
         # Check if we should use fallback only
         if self.use_fallback_only or not self.client:
             self.logger.info("Using fallback analysis (no Gemini API available)")
             return self._fallback_analysis(text)
 
         try:
-            system_prompt = """You are an expert content analyst specializing in viral social media content and YouTube Shorts.
-
-            Analyze the given text segment for its potential to create engaging short-form video content.
-
-            Consider these factors:
-            - Engagement Score (0.0-1.0): How likely this content is to engage viewers
-            - Emotion Score (0.0-1.0): Emotional impact and intensity
-            - Viral Potential (0.0-1.0): Likelihood to be shared and go viral
-            - Quotability (0.0-1.0): How memorable and quotable the content is
-            - Emotions: List of emotions detected (humor, surprise, excitement, inspiration, etc.)
-            - Keywords: Important keywords that make this content engaging
-            - Reason: Brief explanation of why this segment is engaging
-
-            Focus on content that has:
-            - Strong emotional hooks
-            - Surprising or unexpected elements
-            - Humor or entertainment value
-            - Inspirational or motivational content
-            - Controversial or debate-worthy topics
-            - Clear storytelling elements
-            - Quotable phrases or moments"""
+            system_prompt = self.SEGMENT_SYSTEM_PROMPT
+            snippet = text[:1000]  # Limit text length
+
+            cache_key = _response_cache.make_key("gemini-2.5-pro", system_prompt, snippet)
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
             # Use timeout and retry logic
-            import time
             max_retries = 2
             response = None
 
             for attempt in range(max_retries):
                 try:
-                    response = self.client.models.generate_content(
-                        model="gemini-2.5-pro",
-                        contents=[
-                            types.Content(role="user", parts=[types.Part(text=f"Analyze this content segment for YouTube Shorts potential:\n\n{text[:1000]}")])  # Limit text length
-                        ],
-                        config=types.GenerateContentConfig(
-                            system_instruction=system_prompt,
-                            response_mime_type="application/json",
-                            response_schema=SegmentAnalysis,
-                        ),
-                    )
+                    config = self._generation_config(system_prompt, SegmentAnalysis)
+                    async with self._key_semaphore(self.current_key_index):
+                        response = await self.client.aio.models.generate_content(
+                            model="gemini-2.5-pro",
+                            contents=[
+                                types.Content(role="user", parts=[types.Part(text=f"Analyze this content segment for YouTube Shorts potential:\n\n{snippet}")])
+                            ],
+                            config=config,
+                        )
                     break  # Success, exit retry loop
                 except Exception as retry_error:
-                    if attempt == max_retries - 1:
+                    if attempt == max_retries - 1 or self._is_permanent_error(retry_error):
                         raise retry_error
-                    time.sleep(1)  # Wait before retry
+                    await asyncio.sleep(1)  # Wait before retry
 
             if response and response.text:
-                result = json.loads(response.text)
-                return {
-                    'engagement_score': max(0.0, min(1.0, result.get('engagement_score', 0.5))),
-                    'emotion_score': max(0.0, min(1.0, result.get('emotion_score', 0.5))),
-                    'viral_potential': max(0.0, min(1.0, result.get('viral_potential', 0.5))),
-                    'quotability': max(0.0, min(1.0, result.get('quotability', 0.5))),
-                    'emotions': result.get('emotions', [])[:5],  # Limit to 5 emotions
-                    'keywords': result.get('keywords', [])[:10],  # Limit to 10 keywords
-                    'reason': result.get('reason', 'Content has potential for engagement')[:500]
-                }
+                analysis = self._parse_segment_response(response)
+                _response_cache.set(cache_key, analysis, ttl=86400)
+                return analysis
             else:
                 raise Exception("Empty response from Gemini")
 
         except Exception as e:
             error_msg = str(e)
-            self.logger.warning(f"Gemini API error: {error_msg}")
+            self.logger.warning("Gemini API error: %s", error_msg)
 
             # Try to switch to next API key if error is quota-related
             if self._handle_api_error(error_msg) and not self.use_fallback_only:
@@ -173,76 +708,164 @@ class GeminiAnalyzer:
             # Fallback analysis
             return self._fallback_analysis(text)
 
+    def _parse_segment_response(self, response) -> Dict[str, Any]:
+        """Turn a SegmentAnalysis response into a clamped analysis dict"""
+        # The SDK already validated the JSON against the schema; older versions only give us the text
+        parsed = getattr(response, 'parsed', None)
+        if isinstance(parsed, SegmentAnalysis):
+            return parsed.model_dump()
+        return SegmentAnalysis.model_validate_json(response.text).model_dump()
+
+    def _parse_segment_list_response(self, response) -> List[Dict[str, Any]]:
+        """Turn a List[SegmentAnalysis] response into analysis dicts"""
+        parsed = getattr(response, 'parsed', None)
+        if not isinstance(parsed, list):
+            parsed = _SEGMENT_LIST.validate_json(response.text)
+        return [analysis.model_dump() for analysis in parsed]
+
+    def analyze_segments_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze many segments concurrently, spreading grouped requests across every API key"""
+        if self.use_fallback_only or not self.client:
+            self.logger.info("Using fallback analysis (no Gemini API available)")
+            return [self._fallback_analysis(text) for text in texts]
+
+        return _run_on_loop(self._analyze_segments_async(texts))
+
+    def _get_key_clients(self) -> List[genai.Client]:
+        """Return the clients for every API key"""
+        return [self._get_key_client(i) for i in range(len(self.api_keys))]
+
+    async def _analyze_segments_async(self, texts: List[str]) -> List[Dict[str, Any]]:
+        clients = self._get_key_clients()
+        # Monotonic time until which each key is cooling off after a 429/503
+        cooldowns = [0.0] * len(clients)
+
+        size = self.SEGMENTS_PER_REQUEST
+        groups = [texts[i:i + size] for i in range(0, len(texts), size)]
+        tasks = [
+            self._analyze_group(group, i % len(clients), clients, cooldowns)
+            for i, group in enumerate(groups)
+        ]
+        return [analysis for results in await asyncio.gather(*tasks) for analysis in results]
+
+    async def _analyze_group(self, texts: List[str], key_index: int, clients, cooldowns) -> List[Dict[str, Any]]:
+        snippets = [text[:1000] for text in texts]  # Limit text length
+        # Answers from a grouped prompt are kept apart from single-segment answers, which are still reused here
+        cache_keys = [_response_cache.make_key("gemini-2.5-pro", "grouped", self.SEGMENT_SYSTEM_PROMPT, snippet) for snippet in snippets]
+        results = [self._cached_segment(snippet, cache_key) for snippet, cache_key in zip(snippets, cache_keys)]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+
+        if len(missing) > 1:
+            prompt = "Analyze each of these content segments for YouTube Shorts potential. Return exactly one analysis per segment, in the same order:"
+            for number, i in enumerate(missing, 1):
+                prompt += f"\n\nSegment {number}: {snippets[i]}"
+
+            # google-genai only turns the builtin list[...] into an array schema, typing.List is rejected
+            response = await self._generate_on_keys(prompt, list[SegmentAnalysis], key_index, clients, cooldowns)
+            analyses = None
+            if response:
+                try:
+                    analyses = self._parse_segment_list_response(response)
+                except ValueError as e:
+                    self.logger.warning("Could not parse grouped analysis: %s", e)
+
+            if analyses is not None and len(analyses) == len(missing):
+                for i, analysis in zip(missing, analyses):
+                    results[i] = analysis
+                    _response_cache.set(cache_keys[i], analysis, ttl=86400)
+                return results
+
+            # The model dropped or merged segments, so results can't be matched back up by position
+            self.logger.info("Grouped analysis did not return %d results, analyzing segments individually", len(missing))
+
+        singles = await asyncio.gather(*(self._analyze_one(texts[i], key_index, clients, cooldowns) for i in missing))
+        for i, analysis in zip(missing, singles):
+            results[i] = analysis
+        return results
+
+    def _cached_segment(self, snippet: str, grouped_key: bytes):
+        """Cached analysis of a snippet, preferring one made by a single-segment request"""
+        cached = _response_cache.get(_response_cache.make_key("gemini-2.5-pro", self.SEGMENT_SYSTEM_PROMPT, snippet))
+        if cached is None:
+            cached = _response_cache.get(grouped_key)
+        return cached
+
+    async def _analyze_one(self, text: str, key_index: int, clients, cooldowns) -> Dict[str, Any]:
+        snippet = text[:1000]  # Limit text length
+        cache_key = _response_cache.make_key("gemini-2.5-pro", self.SEGMENT_SYSTEM_PROMPT, snippet)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = f"Analyze this content segment for YouTube Shorts potential:\n\n{snippet}"
+        response = await self._generate_on_keys(prompt, SegmentAnalysis, key_index, clients, cooldowns)
+        if response:
+            try:
+                analysis = self._parse_segment_response(response)
+                _response_cache.set(cache_key, analysis, ttl=86400)
+                return analysis
+            except ValueError as e:
+                self.logger.warning("Could not parse segment analysis: %s", e)
+
+        return self._fallback_analysis(text)
+
+    async def _generate_on_keys(self, prompt: str, schema, key_index: int, clients, cooldowns):
+        """Send a segment prompt on the assigned key, moving on to the next key when one is throttled"""
+        # Move to each key at most once, starting with the assigned one and skipping keys that are cooling off
+        for offset in range(len(clients)):
+            index = (key_index + offset) % len(clients)
+            if cooldowns[index] > time.monotonic():
+                continue
+
+            for attempt in range(2):
+                try:
+                    async with self._key_semaphore(index):
+                        response = await clients[index].aio.models.generate_content(
+                            model="gemini-2.5-pro",
+                            contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+                            config=self._generation_config(self.SEGMENT_SYSTEM_PROMPT, schema),
+                        )
+
+                    if not response.text:
+                        raise Exception("Empty response from Gemini")
+                    return response
+
+                except Exception as e:
+                    error_msg = str(e)
+                    if _OVERLOAD_RE.search(error_msg):
+                        self.logger.warning("API key #%d throttled, cooling off for %ds: %s", index + 1, self.KEY_COOLDOWN_SECONDS, error_msg)
+                        cooldowns[index] = time.monotonic() + self.KEY_COOLDOWN_SECONDS
+                        break
+
+                    if attempt or self._is_permanent_error(e):
+                        self.logger.warning("Gemini API error: %s", error_msg)
+                        return None
+
+                    # Timeouts, 5xx responses and dropped connections often pass; back off once on the same key
+                    self.logger.warning("Gemini API error, retrying in %ds: %s", self.RETRY_DELAY_SECONDS, error_msg)
+                    await asyncio.sleep(self.RETRY_DELAY_SECONDS)
+
+        return None
+
     def _fallback_analysis(self, text: str) -> Dict[str, Any]:
         """Enhanced fallback analysis when Gemini is unavailable"""
-        text_lower = text.lower()
-        words = text.split()
-
-        # Enhanced keyword categories
-        engagement_keywords = ['amazing', 'incredible', 'wow', 'shocking', 'unbelievable', 'funny', 'hilarious', 
-                              'awesome', 'fantastic', 'mind-blowing', 'crazy', 'insane', 'epic', 'legendary']
-        emotion_keywords = ['love', 'hate', 'excited', 'surprised', 'happy', 'angry', 'scared', 'thrilled',
-                           'disappointed', 'frustrated', 'overwhelmed', 'passionate', 'emotional', 'heartwarming']
-        viral_keywords = ['viral', 'trending', 'share', 'like', 'subscribe', 'follow', 'must-see', 'breaking',
-                         'exclusive', 'revealed', 'secret', 'exposed', 'truth', 'shocking']
-        quotable_keywords = ['said', 'quote', 'tells', 'explains', 'reveals', 'admits', 'confesses', 'announces']
-
-        # Calculate scores based on keyword presence
-        engagement_score = min(1.0, sum(1 for word in engagement_keywords if word in text_lower) * 0.15)
-        emotion_score = min(1.0, sum(1 for word in emotion_keywords if word in text_lower) * 0.15)
-        viral_score = min(1.0, sum(1 for word in viral_keywords if word in text_lower) * 0.2)
-        quotability_score = min(1.0, sum(1 for word in quotable_keywords if word in text_lower) * 0.2)
-
-        # Length-based scoring (optimal length for shorts)
-        text_length = len(words)
-        if 20 <= text_length <= 50:  # Optimal length for short clips
-            length_bonus = 0.2
-        elif 10 <= text_length <= 80:  # Good length
-            length_bonus = 0.1
-        else:
-            length_bonus = 0.0
-
-        # Add length bonus to all scores
-        engagement_score = min(1.0, engagement_score + length_bonus)
-        emotion_score = min(1.0, emotion_score + length_bonus)
-        viral_score = min(1.0, viral_score + length_bonus)
-        quotability_score = min(1.0, quotability_score + length_bonus)
-
-        # Ensure minimum scores for content viability
-        engagement_score = max(0.4, engagement_score)
-        emotion_score = max(0.3, emotion_score)
-        viral_score = max(0.3, viral_score)
-        quotability_score = max(0.2, quotability_score)
-
-        # Detect emotions based on keywords
-        detected_emotions = []
-        if any(word in text_lower for word in ['funny', 'hilarious', 'joke', 'laugh']):
-            detected_emotions.append('humor')
-        if any(word in text_lower for word in ['shocking', 'surprised', 'unexpected']):
-            detected_emotions.append('surprise')
-        if any(word in text_lower for word in ['love', 'heartwarming', 'beautiful']):
-            detected_emotions.append('inspiration')
-        if any(word in text_lower for word in ['angry', 'frustrated', 'hate']):
-            detected_emotions.append('controversy')
-        if not detected_emotions:
-            detected_emotions = ['general']
-
-        # Extract meaningful keywords (longer words, excluding common words)
-        common_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'a', 'an'}
-        keywords = [word for word in words if len(word) > 3 and word.lower() not in common_words][:8]
-
+        engagement_score, emotion_score, viral_score, quotability_score, emotions, keywords, reason = _fallback_analysis_result(text)
         return {
             'engagement_score': engagement_score,
             'emotion_score': emotion_score,
             'viral_potential': viral_score,
             'quotability': quotability_score,
-            'emotions': detected_emotions[:5],
-            'keywords': keywords,
-            'reason': f'Fallback analysis: {len(words)} words, detected {", ".join(detected_emotions)} content'
+            'emotions': list(emotions),
+            'keywords': list(keywords),
+            'reason': reason
         }
 
     def generate_metadata(self, segment_text: str, original_title: str, language: str = "English") -> Dict[str, Any]:
         """Generate title, description, and tags for a video short using Gemini"""
+        return _run_on_loop(self.generate_metadata_async(segment_text, original_title, language))
+
+    async def generate_metadata_async(self, segment_text: str, original_title: str, language: str = "English") -> Dict[str, Any]:
+        """Async version of generate_metadata"""
         # Check if we should use fallback only
         if self.use_fallback_only or not self.client:
             self.logger.info("Using fallback metadata generation (no Gemini API available)")
@@ -251,105 +874,64 @@ class GeminiAnalyzer:
         # Enhanced retry logic with exponential backoff
         max_retries = 3
         base_delay = 2
-        
+        system_prompt = self.METADATA_SYSTEM_PROMPT.format(language=language)
+
         for attempt in range(max_retries):
             try:
-                system_prompt = f"""You are an expert YouTube content creator specializing in viral Shorts. Generate extremely engaging and viral metadata for a YouTube Short based on the content segment and original video title in {language}.
-
-                Guidelines:
-                - Title: Create a viral, clickbait title under 100 characters with relevant emojis and at least 2 hashtags
-                - Description: Write a compelling 1500+ word description with story, context, emotional hooks, call-to-actions, and strategic hashtag placement
-                - Tags: Generate exactly 28 viral, trending tags for maximum discoverability (total under 500 characters)
-
-                VIRAL TITLE REQUIREMENTS:
-                - Use 2-3 relevant emojis that match the content emotion
-                - Include emotional triggers (SHOCKING, INSANE, VIRAL, etc.)
-                - Create curiosity gaps and cliffhangers
-                - Use trending words and phrases
-                - Make it clickable and shareable
-                - Include at least 2 hashtags in title
-                - Keep under 100 characters total
-
-                VIRAL DESCRIPTION REQUIREMENTS:
-                - Start with a hook that grabs attention immediately
-                - Tell a story or provide context about the moment
-                - Include emotional commentary and reactions
-                - Add background information about the original video
-                - Include call-to-actions (like, subscribe, comment, share)
-                - Use trending hashtags strategically throughout
-                - End with engagement questions
-                - Must be at least 1500 words long
-                - Include relevant emojis throughout the description
-                - Create community engagement prompts
-                - Add background context and reactions
-
-                VIRAL TAGS REQUIREMENTS:
-                - Generate exactly 28 tags
-                - Mix broad trending tags with specific niche tags
-                - Include emotion-based tags (funny, shocking, viral, etc.)
-                - Add content category tags
-                - Include current trending tags
-                - Use variations of keywords
-                - Keep total character count under 500 characters"""
-
                 prompt = f"""Original video title: {original_title}
 
 Content segment: {segment_text}
 
 Generate VIRAL YouTube Shorts metadata with emojis, 1500+ word description, exactly 28 tags, and at least 2 hashtags in title for maximum viral potential in {language}."""
 
-                response = self.client.models.generate_content(
-                    model="gemini-2.5-pro",
-                    contents=[
-                        types.Content(role="user", parts=[types.Part(text=prompt)])
-                    ],
-                    config=types.GenerateContentConfig(
-                        system_instruction=system_prompt,
-                        response_mime_type="application/json",
-                        response_schema=VideoMetadata,
-                    ),
-                )
+                cache_key = _response_cache.make_key("gemini-2.5-pro", system_prompt, language, original_title, prompt)
+                cached = _response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+                config = self._generation_config(system_prompt, VideoMetadata)
+                async with self._key_semaphore(self.current_key_index):
+                    response = await self.client.aio.models.generate_content(
+                        model="gemini-2.5-pro",
+                        contents=[
+                            types.Content(role="user", parts=[types.Part(text=prompt)])
+                        ],
+                        config=config,
+                    )
 
                 if response.text:
-                    result = json.loads(response.text)
+                    parsed = getattr(response, 'parsed', None)
+                    result = parsed.model_dump() if isinstance(parsed, VideoMetadata) else _json_loads(response.text)
                     title = result.get('title', f"🔥 VIRAL Moment from {original_title} 😱 #Shorts #Viral")[:100]
                     description = result.get('description', self._create_long_description(segment_text, original_title))
-                    tags = result.get('tags', self._get_default_viral_tags())[:28]
-                    
                     # Ensure tags are under 500 characters total
-                    tags_str = ', '.join(tags)
-                    if len(tags_str) > 500:
-                        # Truncate tags to fit under 500 characters
-                        truncated_tags = []
-                        current_length = 0
-                        for tag in tags:
-                            if current_length + len(tag) + 2 <= 500:  # +2 for comma and space
-                                truncated_tags.append(tag)
-                                current_length += len(tag) + 2
-                            else:
-                                break
-                        tags = truncated_tags
-                    
-                    return {
+                    tags = result.get('tags')
+                    tags = _truncate_tags(tags[:28]) if tags else list(_DEFAULT_VIRAL_TAGS_TRUNCATED)
+
+                    metadata = {
                         'title': title,
                         'description': description,
                         'tags': tags
                     }
+                    _response_cache.set(cache_key, metadata, ttl=86400)
+                    return metadata
                 else:
                     raise Exception("Empty response from Gemini")
 
             except Exception as e:
                 error_msg = str(e)
-                self.logger.warning(f"Gemini API error (attempt {attempt + 1}): {error_msg}")
+                self.logger.warning("Gemini API error (attempt %d): %s", attempt + 1, error_msg)
+
+                if self._is_permanent_error(e):
+                    break
 
                 # Check if it's a rate limit or overload error
-                if any(indicator in error_msg.lower() for indicator in ["429", "503", "resource_exhausted", "quota", "rate limit", "overloaded", "unavailable"]):
+                if _OVERLOAD_RE.search(error_msg):
                     if attempt < max_retries - 1:
                         # Exponential backoff
                         delay = base_delay * (2 ** attempt)
-                        self.logger.info(f"API overloaded/rate limited, waiting {delay} seconds before retry...")
-                        import time
-                        time.sleep(delay)
+                        self.logger.info("API overloaded/rate limited, waiting %d seconds before retry...", delay)
+                        await asyncio.sleep(delay)
                         
                         # Try switching to next API key
                         if self._handle_api_error(error_msg) and not self.use_fallback_only:
@@ -372,155 +954,20 @@ Generate VIRAL YouTube Shorts metadata with emojis, 1500+ word description, exac
 
     def _fallback_metadata(self, segment_text: str, original_title: str, language: str = "English") -> Dict[str, Any]:
         """Enhanced fallback metadata generation for viral content"""
-        words = segment_text.split()
-        text_lower = segment_text.lower()
-
-        # Extract meaningful keywords (exclude common words)
-        common_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'a', 'an', 'this', 'that'}
-        key_words = [word for word in words if len(word) > 3 and word.lower() not in common_words][:5]
-
-        # Generate viral title with emojis and hashtags based on content type
-        if any(word in text_lower for word in ['funny', 'hilarious', 'joke', 'laugh']):
-            title = f"😂 HILARIOUS: {' '.join(key_words[:2])} - You Won't Stop Laughing! 🤣 #Shorts #Viral"
-            emoji_theme = "humor"
-        elif any(word in text_lower for word in ['shocking', 'unbelievable', 'incredible', 'insane']):
-            title = f"😱 SHOCKING: {' '.join(key_words[:2])} - This Will Blow Your Mind! 🤯 #Shorts #Viral"
-            emoji_theme = "shock"
-        elif any(word in text_lower for word in ['amazing', 'awesome', 'fantastic', 'incredible']):
-            title = f"🔥 AMAZING: {' '.join(key_words[:2])} - Absolutely Incredible! ✨ #Shorts #Viral"
-            emoji_theme = "amazing"
-        elif any(word in text_lower for word in ['secret', 'revealed', 'truth', 'hidden']):
-            title = f"🤫 REVEALED: {' '.join(key_words[:2])} - The Truth Exposed! 😲 #Shorts #Viral"
-            emoji_theme = "secret"
-        elif any(word in text_lower for word in ['music', 'song', 'dance', 'singing']):
-            title = f"🎵 VIRAL MUSIC: {' '.join(key_words[:2])} - This Hit Different! 🎶 #Shorts #Viral"
-            emoji_theme = "music"
-        else:
-            title = f"🔥 VIRAL: {' '.join(key_words[:2])} - Must See This! 😍 #Shorts #Viral"
-            emoji_theme = "general"
-
-        # Limit title to 100 characters
-        title = title[:100]
-
-        # Generate long viral description (1500+ words)
-        description = self._create_long_description(segment_text, original_title, emoji_theme)
-
-        # Generate 28 viral tags
-        all_tags = self._get_default_viral_tags()
-        
-        # Ensure tags are under 500 characters total
-        tags_str = ', '.join(all_tags[:28])
-        if len(tags_str) > 500:
-            # Truncate tags to fit under 500 characters
-            truncated_tags = []
-            current_length = 0
-            for tag in all_tags:
-                if current_length + len(tag) + 2 <= 500:  # +2 for comma and space
-                    truncated_tags.append(tag)
-                    current_length += len(tag) + 2
-                else:
-                    break
-            all_tags = truncated_tags
-
+        title, description = _fallback_metadata_result(segment_text, original_title, language)
         return {
             'title': title,
             'description': description,
-            'tags': all_tags
+            'tags': list(_DEFAULT_VIRAL_TAGS_TRUNCATED)
         }
 
     def _create_long_description(self, segment_text: str, original_title: str, emoji_theme: str = "general") -> str:
         """Create a long viral description with emojis and hashtags (1500+ words)"""
-        text_lower = segment_text.lower()
-
-        # Choose emojis based on theme
-        emoji_sets = {
-            "humor": ["😂", "🤣", "😆", "😄", "🙃", "😁", "😊"],
-            "shock": ["😱", "🤯", "😲", "🫨", "😵", "🤐", "😳"],
-            "amazing": ["🔥", "✨", "⭐", "💫", "🌟", "💥", "🚀"],
-            "secret": ["🤫", "👀", "🕵️", "🔍", "💭", "🤔", "😏"],
-            "music": ["🎵", "🎶", "🎤", "🎸", "🎹", "🥁", "🎺"],
-            "general": ["🔥", "😍", "🤩", "💯", "👏", "🙌", "✨"]
-        }
-
-        emojis = emoji_sets.get(emoji_theme, emoji_sets["general"])
-
-        description = f"""🚨 VIRAL ALERT! {emojis[0]} This moment from "{original_title}" is absolutely INSANE and you NEED to see it! {emojis[1]}
-
-{emojis[2]} WHAT JUST HAPPENED?! {emojis[2]}
-This clip is breaking the internet right now and for good reason! The moment captured here is pure gold - the kind of content that makes you stop scrolling and watch it 10 times in a row! {emojis[3]} I've been creating content for years, and moments like this remind me why I fell in love with sharing authentic experiences with the world.
-
-💭 THE STORY BEHIND THIS VIRAL MOMENT:
-This incredible segment comes from the amazing video "{original_title}" and let me tell you, when this part hit, the comments section went WILD! {emojis[4]} People are sharing this everywhere - Twitter, TikTok, Instagram, you name it! The original video has been gaining massive traction, but this particular moment? It's the crown jewel that everyone's talking about.
-
-🎬 WHAT MAKES THIS SO SPECIAL:
-"{segment_text[:300]}..." - Just reading this gives you chills, right? {emojis[5]} The way this moment unfolds is absolutely perfect. It's got everything - emotion, authenticity, and that special something that makes content go viral! You can feel the raw energy, the genuine emotion, and the perfect timing that makes this clip so incredibly shareable.
-
-🌟 WHY EVERYONE'S TALKING ABOUT IT:
-✅ Pure, unfiltered emotion that hits different
-✅ The timing is absolutely perfect
-✅ Relatable content that speaks to everyone
-✅ That "main character energy" we all love
-✅ Perfect for sharing with friends and family
-✅ Authentic moments that can't be scripted
-✅ The kind of content that makes you feel something real
-✅ Universal appeal that crosses all boundaries
-
-🔥 COMMUNITY REACTIONS:
-The comments are going CRAZY! {emojis[6]} People are saying things like "This is why I love the internet", "I can't stop watching this", and "This made my whole day!" The way this resonates with people is incredible! We're seeing reactions from all over the world - people sharing their own similar experiences, relating to the emotions, and connecting with the authenticity of this moment.
-
-💡 BEHIND THE SCENES:
-What makes this even more special is the context. This isn't scripted or planned - it's pure, authentic content that just happened to be caught on camera. That's the magic of real moments! {emojis[0]} In a world full of manufactured content, finding genuine moments like this is like discovering treasure. The spontaneity, the real emotions, the unfiltered reactions - this is what makes content truly viral.
+        return _create_long_description(segment_text, original_title, emoji_theme)
 
-🎯 JOIN THE CONVERSATION:
-👍 SMASH that like button if this gave you chills!
-🔔 Subscribe for more viral moments like this!
-💬 Comment below - what was your reaction when you first saw this?
-📤 Share this with someone who needs to see it!
-🔄 Save this for when you need a pick-me-up!
-🎥 Tag a friend who would love this content!
-💫 Let us know what other moments you'd like to see!
-
-🏷️ TRENDING NOW:
-This clip is part of a growing trend of authentic, unfiltered content that's taking over social media. We're living in the golden age of real moments being captured and shared! {emojis[1]} The algorithm is rewarding genuine content, and creators are finally understanding that authenticity beats perfection every single time.
-
-📈 THE VIRAL FACTOR:
-What makes content go viral? It's moments like these - unexpected, genuine, and emotionally resonant. This clip has all the elements: perfect timing, authentic emotion, and that indefinable quality that makes you want to share it immediately! The engagement metrics are through the roof, with views, likes, and shares climbing by the minute.
-
-🌍 GLOBAL IMPACT:
-People from all over the world are connecting with this moment. It doesn't matter what language you speak or where you're from - good content is universal! {emojis[2]} We're seeing reactions from every continent, proving that authentic human experiences transcend cultural boundaries.
-
-🎉 MORE AMAZING CONTENT:
-If you loved this clip, you're going to OBSESS over our other videos! We're constantly finding and sharing the most incredible, viral-worthy moments from across the internet. This is just the beginning! {emojis[3]} Our content library is packed with moments that will make you laugh, cry, think, and feel inspired.
-
-💬 COMMUNITY ENGAGEMENT:
-What do you think makes this moment so special? Drop your thoughts in the comments! {emojis[4]} We love hearing from our community and your perspectives always add so much value to these conversations. Some of the best insights come from you - our incredible viewers who bring unique perspectives to every piece of content we share.
-
-🎭 THE EMOTIONAL JOURNEY:
-This clip takes you on an emotional rollercoaster that's impossible to ignore. From the initial surprise to the building tension, and finally to that perfect climactic moment - it's a masterclass in storytelling without even trying to be one! {emojis[5]} The natural progression of emotions keeps you hooked from start to finish.
-
-🌟 INSPIRATION CORNER:
-Moments like this remind us why we create content in the first place. It's not just about views or likes - it's about creating connections, sharing experiences, and bringing people together through the power of storytelling. {emojis[6]} Every time we witness genuine human moments like this, it reinforces our belief in the power of authentic content.
-
-⚡ FINAL THOUGHTS:
-In a world full of content, this moment stands out. It's real, it's powerful, and it's exactly what we need more of. Thank you for being part of this incredible community that celebrates authentic human moments! {emojis[0]} Your support means everything to us, and it's what keeps us motivated to find and share these amazing moments with the world.
-
-🙏 Don't forget to show some love - your engagement helps us find and share more amazing content like this! Every like, comment, and share makes a difference and helps us reach more people who need to see these incredible moments! {emojis[1]}
-
-📢 CALL TO ACTION:
-Ready to see more content like this? Hit that subscribe button and turn on notifications so you never miss a viral moment! Share this with your friends, family, and anyone who appreciates authentic, incredible content. Let's build a community of people who celebrate real moments and genuine human experiences! {emojis[2]}
-
-#Shorts #Viral #Trending #MustWatch #Authentic #RealMoments #ViralVideo #ShareThis #Amazing #Incredible #SocialMedia #Funny #Emotional #Heartwarming #Inspiring #Entertainment #PopCulture #Internet #Community #Reactions #Mood #Vibes #Content #Creator #YouTube #TikTok #Instagram #Twitter #Share #Like #Subscribe #Comment #Save #Repost #Trending2024 #ViralContent #MustSee #Epic #Legendary #Unforgettable #Perfect #Timing #Genuine #Unfiltered #Raw #Authentic #Beautiful #Powerful #Moving #Touching #Hilarious #Shocking #Unbelievable #Incredible #Outstanding #Phenomenal #Extraordinary #Remarkable #Sensational #Spectacular #Breathtaking #Mindblowing #Gamechanging #Revolutionary #Engaging #Captivating #Compelling #Mesmerizing #Addictive #Shareable #Relatable #Universal #Timeless #Memorable"""
-
-        return description
-
-    def _get_default_viral_tags(self) -> List[str]:
+    def _get_default_viral_tags(self) -> Tuple[str, ...]:
         """Get 28 default viral tags"""
-        return [
-            'shorts', 'viral', 'trending', 'mustsee', 'amazing', 'incredible', 'shocking', 'unbelievable',
-            'funny', 'hilarious', 'entertainment', 'comedy', 'emotional', 'heartwarming', 'inspiring',
-            'motivation', 'lifestyle', 'relatable', 'authentic', 'genuine', 'raw', 'real', 'moments',
-            'reactions', 'vibes', 'mood', 'content', 'creator'
-        ]
+        return _DEFAULT_VIRAL_TAGS
 
     def analyze_video_file(self, video_path: str) -> Dict[str, Any]:
         """Analyze video file directly with Gemini vision capabilities"""
@@ -530,16 +977,13 @@ Ready to see more content like this? Hit that subscribe button and turn on notif
             return {'analysis': 'Video analysis not available - using audio transcript analysis instead'}
 
         try:
-            with open(video_path, "rb") as f:
-                video_bytes = f.read()
+            # Upload through the Files API so the video streams from disk instead of being held in memory
+            video_file = self._upload_video_file(video_path)
 
             response = self.client.models.generate_content(
                 model="gemini-2.5-pro",
                 contents=[
-                    types.Part.from_bytes(
-                        data=video_bytes,
-                        mime_type="video/mp4",
-                    ),
+                    video_file,
                     "Analyze this video for engaging moments, emotional highlights, and viral potential. "
                     "Identify the most interesting segments that would work well as YouTube Shorts."
                 ],
@@ -548,5 +992,39 @@ Ready to see more content like this? Hit that subscribe button and turn on notif
             return {'analysis': response.text if response.text else 'No analysis available'}
 
         except Exception as e:
-            self.logger.error(f"Video file analysis failed: {e}")
-            return {'analysis': 'Video analysis not available'}
\ No newline at end of file
+            self.logger.error("Video file analysis failed: %s", e)
+            return {'analysis': 'Video analysis not available'}
+
+    def _upload_video_file(self, video_path: str):
+        """Upload a video with the Gemini Files API and wait until it can be referenced"""
+        # Uploaded files belong to the key's project, so the same content is cached per key
+        cache_key = _response_cache.make_key("gemini-file", self.api_keys[self.current_key_index], _file_sha256(video_path))
+
+        video_file = None
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            try:
+                video_file = self.client.files.get(name=cached['name'])
+            except Exception as e:
+                self.logger.info("Uploaded file %s no longer available, uploading again: %s", cached['name'], e)
+
+        if video_file is None or (video_file.state and video_file.state.name == "FAILED"):
+            video_file = self.client.files.upload(
+                file=video_path,
+                config=types.UploadFileConfig(mime_type="video/mp4"),
+            )
+            _response_cache.set(cache_key, {'name': video_file.name}, ttl=self.UPLOADED_FILE_TTL)
+        else:
+            self.logger.info("Reusing uploaded file %s for %s", video_file.name, video_path)
+
+        deadline = time.monotonic() + self.FILE_PROCESSING_TIMEOUT
+        while video_file.state and video_file.state.name == "PROCESSING":
+            if time.monotonic() > deadline:
+                raise Exception("Timed out waiting for Gemini to process the video")
+            time.sleep(2)
+            video_file = self.client.files.get(name=video_file.name)
+
+        if video_file.state and video_file.state.name == "FAILED":
+            raise Exception(f"Gemini could not process the video: {video_file.error}")
+
+        return video_file
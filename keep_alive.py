@@ -1,85 +1,137 @@
-
-import requests
-import time
+import asyncio
+import atexit
+import httpx
 import threading
 import logging
 import os
-from datetime import datetime
 
 class KeepAlive:
+    # How long stop() waits for an in-flight ping before giving up on the thread
+    STOP_TIMEOUT = 2.0
+
     def __init__(self, app_url=None, interval=300):  # 5 minutes default
         self.logger = logging.getLogger(__name__)
         self.app_url = app_url or self._get_app_url()
         self.interval = interval
         self.running = False
         self.thread = None
-        
+        self._stop = threading.Event()
+
+        # Set while the background loop runs; ping_now schedules onto them to share the pooled client
+        self._loop = None
+        self._task = None
+        self._client = None
+
+        # Only the forking process keeps the ping thread; children must not try to stop or reuse it
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """Forget the parent's ping thread and loop in a forked child"""
+        self.running = False
+        self.thread = None
+        self._stop = threading.Event()
+        self._loop = None
+        self._task = None
+        self._client = None
+
     def _get_app_url(self):
         """Get the app URL from environment variables"""
         # Try to get from Replit domain
         replit_domain = os.environ.get("REPLIT_DEV_DOMAIN")
         if replit_domain:
             return f"https://{replit_domain}"
-        
+
         # Try to get from Render domain
         render_domain = os.environ.get("RENDER_EXTERNAL_URL")
         if render_domain:
             return render_domain
-            
+
         # Default fallback
         return "http://localhost:5000"
-    
+
+    def _create_client(self):
+        """One keep-alive HTTP/2 client, so every ping reuses the same connection"""
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=4),
+            retries=2,
+        )
+        return httpx.AsyncClient(transport=transport, timeout=30, headers={'User-Agent': 'KeepAlive/1.0'})
+
     def start(self):
         """Start the keep-alive service"""
         if not self.running:
             self.running = True
-            self.thread = threading.Thread(target=self._keep_alive_loop, daemon=True)
+            self._stop.clear()
+            self.thread = threading.Thread(target=lambda: asyncio.run(self._keep_alive_loop()), daemon=True)
             self.thread.start()
             self.logger.info(f"Keep-alive service started for {self.app_url}")
-    
+
     def stop(self):
         """Stop the keep-alive service"""
+        if not self.running:
+            return
         self.running = False
+        self._stop.set()
+        loop = self._loop
+        if loop:
+            try:
+                # Cancelling interrupts both the interval wait and a ping that is still in flight
+                loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:  # The loop already finished
+                pass
         if self.thread:
-            self.thread.join()
+            # Cancellation normally ends the loop at once; the thread is a daemon, so never hold up shutdown for it
+            self.thread.join(timeout=self.STOP_TIMEOUT)
+            if self.thread.is_alive():
+                self.logger.warning("Keep-alive thread did not exit within %.1fs", self.STOP_TIMEOUT)
+                return
         self.logger.info("Keep-alive service stopped")
-    
-    def _keep_alive_loop(self):
+
+    async def _keep_alive_loop(self):
         """Main keep-alive loop"""
-        while self.running:
-            try:
-                # Make a simple GET request to keep the app alive
-                response = requests.get(
-                    self.app_url,
-                    timeout=30,
-                    headers={'User-Agent': 'KeepAlive/1.0'}
-                )
-                
-                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                if response.status_code == 200:
-                    self.logger.info(f"Keep-alive ping successful at {current_time}")
-                else:
-                    self.logger.warning(f"Keep-alive ping returned status {response.status_code} at {current_time}")
-                    
-            except requests.exceptions.RequestException as e:
-                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                self.logger.error(f"Keep-alive ping failed at {current_time}: {e}")
-            
-            # Wait for the specified interval
-            time.sleep(self.interval)
-    
+        # Record the task before publishing the loop, stop() uses both
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        try:
+            async with self._create_client() as client:
+                self._client = client
+                while not self._stop.is_set():
+                    try:
+                        # Make a simple GET request to keep the app alive
+                        response = await client.get(self.app_url)
+
+                        # The log format supplies the timestamp
+                        if response.status_code == 200:
+                            self.logger.info("Keep-alive ping successful")
+                        else:
+                            self.logger.warning("Keep-alive ping returned status %d", response.status_code)
+
+                    except httpx.HTTPError:
+                        self.logger.exception("Keep-alive ping failed")
+
+                    # Wait for the specified interval; stop() cancels the task to end it early
+                    await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._client = None
+            self._loop = None
+
     def ping_now(self):
         """Manually trigger a keep-alive ping"""
         try:
-            response = requests.get(
-                self.app_url,
-                timeout=30,
-                headers={'User-Agent': 'KeepAlive/1.0'}
-            )
+            loop, client = self._loop, self._client
+            if loop and client:
+                # Run on the background loop so the request goes over its pooled connection
+                future = asyncio.run_coroutine_threadsafe(client.get(self.app_url), loop)
+                response = future.result(timeout=35)
+            else:
+                response = httpx.get(self.app_url, timeout=30, headers={'User-Agent': 'KeepAlive/1.0'})
             return response.status_code == 200
         except:
             return False
 
 # Global keep-alive instance
 keep_alive_service = KeepAlive()
+atexit.register(keep_alive_service.stop)
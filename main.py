@@ -1,8 +1,68 @@
-from app import app
+import os
+import fcntl
+import tempfile
+from datetime import timedelta
+from gunicorn.app.base import BaseApplication
+from app import app, db
 from keep_alive import keep_alive_service
+from routes import fail_interrupted_jobs, shutdown_job_executor
+from youtube_uploader import fail_abandoned_uploads
 
-if __name__ == '__main__':
-    # Start keep-alive service
+def on_starting(server):
+    """Clean up after the previous server process before any worker starts"""
+    # No worker is running yet, so every UPLOADING short was left behind by a process that is gone
+    fail_abandoned_uploads(older_than=timedelta(0))
+    fail_interrupted_jobs()
+
+# Whichever worker holds this lock runs the keep-alive pings; named after the master so restarts don't collide
+KEEP_ALIVE_LOCK = os.path.join(tempfile.gettempdir(), f"keep-alive-{os.getpid()}.lock")
+
+def post_fork(server, worker):
+    """Per-worker setup: fresh database connections, and the keep-alive pings in one worker"""
+    # Connections opened in the master during startup must not be shared across forks
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    # The master forks workers, so the ping thread lives in exactly one worker instead. The lock is
+    # released when its holder exits, and the worker forked to replace it takes the pings over.
+    lock_file = open(KEEP_ALIVE_LOCK, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return
+    worker.keep_alive_lock = lock_file
     keep_alive_service.start()
 
-    app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
+def worker_exit(server, worker):
+    """Cancel this worker's queued jobs and uploads before its pool threads are joined"""
+    shutdown_job_executor()
+
+class StandaloneApplication(BaseApplication):
+    """Serve the Flask app with gunicorn's threaded workers instead of the Werkzeug dev server"""
+
+    def __init__(self, application, options=None):
+        self.options = options or {}
+        self.application = application
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+if __name__ == '__main__':
+    options = {
+        'bind': f"0.0.0.0:{os.environ.get('PORT', 5000)}",
+        'worker_class': 'gthread',
+        'workers': int(os.environ.get('WEB_WORKERS', 2)),
+        'threads': int(os.environ.get('WEB_THREADS', 8)),
+        'keepalive': 30,
+        'timeout': 120,
+        'on_starting': on_starting,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }
+    StandaloneApplication(app, options).run()
@@ -3,34 +3,63 @@ import sqlite3
 import os
 from app import app
 
+# Schema version the code expects; stored in the database's PRAGMA user_version
+SCHEMA_VERSION = 3
+
 def migrate_database():
-    """Add missing content_language column to video_jobs table"""
+    """Bring the database schema up to SCHEMA_VERSION"""
     db_path = os.path.join('instance', 'youtube_shorts_generator.db')
     
     if not os.path.exists(db_path):
         print("Database file not found")
         return
     
+    conn = sqlite3.connect(db_path, isolation_level=None)
     try:
-        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # Check if content_language column exists
-        cursor.execute("PRAGMA table_info(video_jobs)")
-        columns = [column[1] for column in cursor.fetchall()]
+        # Same tuning as the app's connections; WAL mode persists in the database file
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA temp_store=MEMORY")
         
-        if 'content_language' not in columns:
-            print("Adding content_language column to video_jobs table...")
-            cursor.execute("ALTER TABLE video_jobs ADD COLUMN content_language VARCHAR(20) DEFAULT 'hinglish'")
-            conn.commit()
-            print("Successfully added content_language column")
-        else:
-            print("content_language column already exists")
+        # A single integer read decides whether anything needs to run
+        current_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if current_version >= SCHEMA_VERSION:
+            print(f"Database schema is up to date (version {current_version})")
+            return
         
-        conn.close()
+        # Take the write lock up front so a running app can't interleave with the migration
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        if current_version < 1:
+            # Databases created by create_all before versioning may already have the column
+            cursor.execute("PRAGMA table_info(video_jobs)")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'content_language' not in columns:
+                print("Adding content_language column to video_jobs table...")
+                cursor.execute("ALTER TABLE video_jobs ADD COLUMN content_language VARCHAR(20) DEFAULT 'hinglish'")
+        
+        if current_version < 2:
+            # create_all only builds indexes together with new tables, so add the listing index to existing databases
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_video_jobs_created_at ON video_jobs (created_at DESC)")
+        
+        if current_version < 3:
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_video_shorts_job_status ON video_shorts (job_id, upload_status)")
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        cursor.execute("COMMIT")
+        print(f"Migrated database schema from version {current_version} to {SCHEMA_VERSION}")
         
     except Exception as e:
+        # Leave the schema as it was instead of holding the write lock on a half-applied migration
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
         print(f"Error during migration: {e}")
+    finally:
+        conn.close()
 
 if __name__ == '__main__':
     with app.app_context():
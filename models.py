@@ -56,6 +56,9 @@ class VideoJob(db.Model):
     shorts = db.relationship('VideoShort', backref='job', lazy=True, cascade='all, delete-orphan')
     transcript_segments = db.relationship('TranscriptSegment', backref='job', lazy=True, cascade='all, delete-orphan')
 
+    # Newest-first listings on the index and jobs pages read straight from this index
+    __table_args__ = (db.Index('ix_video_jobs_created_at', created_at.desc()),)
+
 class VideoShort(db.Model):
     __tablename__ = 'video_shorts'
 
@@ -97,6 +100,9 @@ class VideoShort(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    # Upload batches and the remaining-shorts check filter on both columns together
+    __table_args__ = (db.Index('ix_video_shorts_job_status', job_id, upload_status),)
+
 class TranscriptSegment(db.Model):
     __tablename__ = 'transcript_segments'
 
@@ -1,22 +1,91 @@
 
 import os
+import functools
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, jsonify, session, send_file
+from sqlalchemy.orm import joinedload
+from werkzeug.security import safe_join
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, send_file, make_response, Response
 from app import app, db
-from models import VideoJob, VideoShort, UploadStatus
+from models import VideoJob, VideoShort, TranscriptSegment, ProcessingStatus, UploadStatus
 from video_processor import VideoProcessor
 from oauth_handler import OAuthHandler
-from youtube_uploader import YouTubeUploader
+from youtube_uploader import YouTubeUploader, release_claimed_shorts, fail_abandoned_uploads
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bounded pool for video processing; extra submissions wait in its queue instead of spawning threads
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get('JOB_WORKERS', 2)), thread_name_prefix='vidproc')
+
+# Futures of submitted jobs that have not finished yet, in submission order; per gunicorn worker process
+JOB_FUTURES = {}
+
+@functools.lru_cache(maxsize=None)
+def get_oauth_handler():
+    """Shared OAuthHandler; it only holds the app's client configuration"""
+    return OAuthHandler()
+
+@functools.lru_cache(maxsize=None)
+def get_uploader():
+    """Shared YouTubeUploader; per-user credentials are looked up on every upload"""
+    return YouTubeUploader()
+
+def _process_job(job_id):
+    """Run one job on a pool thread with its own VideoProcessor, so Gemini key state starts fresh per job"""
+    VideoProcessor().process_video(job_id)
+
+def shutdown_job_executor():
+    """Cancel queued work so only jobs that are already running hold up the exit"""
+    # concurrent.futures joins its pool threads before atexit callbacks run, and those threads first work
+    # through everything still queued, so the server calls this from its own shutdown path instead
+    JOB_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+def fail_interrupted_jobs():
+    """Mark jobs that no process is working on any more as failed; only safe before any worker has started"""
+    with app.app_context():
+        failed = VideoJob.query.filter(
+            VideoJob.status.notin_([ProcessingStatus.COMPLETED, ProcessingStatus.FAILED])
+        ).update({
+            VideoJob.status: ProcessingStatus.FAILED,
+            VideoJob.error_message: "Processing was interrupted by a server restart"
+        }, synchronize_session=False)
+        db.session.commit()
+        if failed:
+            logger.warning(f"Marked {failed} interrupted job(s) as failed")
+
+def _job_done(job_id, future):
+    """Forget a finished job's future; a job cancelled while still queued is marked failed"""
+    JOB_FUTURES.pop(job_id, None)
+    if future.cancelled():
+        with app.app_context():
+            VideoJob.query.filter_by(id=job_id, status=ProcessingStatus.PENDING).update({
+                VideoJob.status: ProcessingStatus.FAILED,
+                VideoJob.error_message: "Cancelled by a server shutdown before processing started"
+            }, synchronize_session=False)
+            db.session.commit()
+
+def _release_if_cancelled(short_ids, future):
+    """Give claimed shorts back when their queued upload is cancelled before it starts"""
+    if future.cancelled():
+        release_claimed_shorts(short_ids)
+
+def _queue_position(job_id):
+    """1-based position of a job still waiting for a worker, or None if it is running or unknown"""
+    waiting = [queued_id for queued_id, future in list(JOB_FUTURES.items()) if not future.running() and not future.done()]
+    return waiting.index(job_id) + 1 if job_id in waiting else None
+
+# Template context when no YouTube account is connected, shared rather than rebuilt per render
+_EMPTY_CTX = {'youtube_connected': False, 'user_email': None, 'youtube_channel': None}
+
 @app.context_processor
 def inject_common_vars():
     """Inject common variables into all templates"""
+    if not session.get('youtube_connected'):
+        return _EMPTY_CTX
     return {
-        'youtube_connected': session.get('youtube_connected', False),
+        'youtube_connected': True,
         'user_email': session.get('youtube_email'),
         'youtube_channel': session.get('youtube_channel')
     }
@@ -26,14 +95,7 @@ def index():
     # Get recent jobs for display
     recent_jobs = VideoJob.query.order_by(VideoJob.created_at.desc()).limit(6).all()
     
-    # Check if YouTube is connected
-    youtube_connected = session.get('youtube_connected', False)
-    user_email = session.get('youtube_email')
-    
-    return render_template('index.html', 
-                         recent_jobs=recent_jobs,
-                         youtube_connected=youtube_connected,
-                         user_email=user_email)
+    return render_template('index.html', recent_jobs=recent_jobs)
 
 @app.route('/submit', methods=['POST'])
 def submit_video():
@@ -61,12 +123,10 @@ def submit_video():
         db.session.add(job)
         db.session.commit()
         
-        # Start processing in background thread
-        import threading
-        processor = VideoProcessor()
-        thread = threading.Thread(target=processor.process_video, args=(job.id,))
-        thread.daemon = True
-        thread.start()
+        # Queue processing on the background worker pool
+        future = JOB_EXECUTOR.submit(_process_job, job.id)
+        JOB_FUTURES[job.id] = future
+        future.add_done_callback(functools.partial(_job_done, job.id))
         
         return redirect(url_for('process', job_id=job.id))
         
@@ -77,58 +137,60 @@ def submit_video():
 
 @app.route('/results/view/<int:job_id>')
 def view_results(job_id):
-    job = VideoJob.query.get_or_404(job_id)
-    shorts = VideoShort.query.filter_by(job_id=job_id).all()
-    
-    # Pass template variables
-    youtube_connected = session.get('youtube_connected', False)
-    user_email = session.get('youtube_email')
+    # Uploads whose worker died never finish; fail them so they can be retried
+    fail_abandoned_uploads(job_id=job_id)
+    job = VideoJob.query.options(joinedload(VideoJob.shorts)).filter_by(id=job_id).first_or_404()
+    shorts = job.shorts
     
-    return render_template('results.html', 
-                         job=job, 
-                         shorts=shorts,
-                         youtube_connected=youtube_connected,
-                         user_email=user_email)
+    return render_template('results.html', job=job, shorts=shorts)
 
 @app.route('/jobs')
 def list_jobs():
-    jobs = VideoJob.query.order_by(VideoJob.created_at.desc()).all()
-    return render_template('jobs.html', jobs=jobs)
+    page = request.args.get('page', 1, type=int)
+    pagination = VideoJob.query.order_by(VideoJob.created_at.desc()).paginate(page=page, per_page=25, error_out=False)
+    return render_template('jobs.html', pagination=pagination, jobs=pagination.items)
+
+def _safe_unlink(path):
+    """Remove a file with a single unlink, ignoring empty paths and files that are already gone"""
+    if not path:
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _safe_rmtree(path):
+    """Remove a directory tree that may not exist"""
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        pass
+
+def _purge_pycache(path):
+    """Remove every __pycache__ below path, descending only into directories"""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name == '__pycache__':
+                    shutil.rmtree(entry.path)
+                else:
+                    _purge_pycache(entry.path)
 
 @app.route('/cleanup', methods=['POST'])
 def cleanup_system():
     try:
-        # Clean up temporary files
-        temp_dir = 'temp'
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            os.makedirs(temp_dir, exist_ok=True)
-        
-        # Clean up uploads
-        uploads_dir = 'uploads'
-        if os.path.exists(uploads_dir):
-            shutil.rmtree(uploads_dir)
-            os.makedirs(uploads_dir, exist_ok=True)
-        
-        # Clean up outputs
-        outputs_dir = 'outputs'
-        if os.path.exists(outputs_dir):
-            shutil.rmtree(outputs_dir)
-            os.makedirs(outputs_dir, exist_ok=True)
-        
-        # Clean up .git folder if exists
-        git_dir = '.git'
-        if os.path.exists(git_dir):
-            shutil.rmtree(git_dir)
+        # Remove temp, uploads, outputs and the .git folder in parallel, then recreate the working directories
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_safe_rmtree, ('temp', 'uploads', 'outputs', '.git')))
+        for working_dir in ('temp', 'uploads', 'outputs'):
+            os.makedirs(working_dir, exist_ok=True)
         
         # Clean up database
         db.drop_all()
         db.create_all()
         
         # Clean up __pycache__ directories
-        for root, dirs, files in os.walk('.'):
-            if '__pycache__' in dirs:
-                shutil.rmtree(os.path.join(root, '__pycache__'))
+        _purge_pycache('.')
         
         flash('All temporary files, cache, database, and .git folder cleaned successfully!', 'success')
         
@@ -140,8 +202,7 @@ def cleanup_system():
 
 @app.route('/youtube/auth')
 def youtube_auth():
-    oauth_handler = OAuthHandler()
-    auth_url = oauth_handler.get_authorization_url()
+    auth_url = get_oauth_handler().get_authorization_url()
     return redirect(auth_url)
 
 @app.route('/youtube/callback')
@@ -152,8 +213,9 @@ def youtube_callback():
             flash('Authorization failed', 'error')
             return redirect(url_for('index'))
         
-        oauth_handler = OAuthHandler()
-        user_info = oauth_handler.exchange_code_for_tokens(code)
+        user_info = get_oauth_handler().exchange_code_for_tokens(code)
+        # New tokens were stored; stop uploads from using the previously cached grant
+        get_uploader().forget_credentials(user_info.get('email'))
         
         session['youtube_connected'] = True
         session['youtube_email'] = user_info.get('email')
@@ -167,17 +229,24 @@ def youtube_callback():
         flash('Failed to connect YouTube account', 'error')
         return redirect(url_for('index'))
 
-@app.route('/upload_shorts/<int:job_id>')
+@app.route('/upload_shorts/<int:job_id>', methods=['POST'])
 def upload_shorts(job_id):
     try:
         if not session.get('youtube_connected'):
             flash('Please connect your YouTube account first', 'error')
             return redirect(url_for('youtube_auth'))
         
-        uploader = YouTubeUploader()
-        uploader.upload_shorts_for_job(job_id, session.get('youtube_email'))
+        # Mark the shorts as uploading before queueing, so a repeated click finds nothing left to claim
+        short_ids = get_uploader().claim_job_shorts(job_id)
+        if not short_ids:
+            flash('No pending shorts to upload', 'info')
+            return redirect(url_for('view_results', job_id=job_id))
         
-        flash('Shorts uploaded to YouTube successfully!', 'success')
+        # Upload on the worker pool; each short's upload_status shows progress on the results page
+        future = JOB_EXECUTOR.submit(get_uploader().upload_shorts_for_job, job_id, session.get('youtube_email'), short_ids)
+        future.add_done_callback(functools.partial(_release_if_cancelled, short_ids))
+        
+        flash('Upload queued - shorts will appear as uploaded once YouTube finishes processing them', 'info')
         return redirect(url_for('view_results', job_id=job_id))
         
     except Exception as e:
@@ -187,25 +256,43 @@ def upload_shorts(job_id):
 
 @app.route('/results/<int:job_id>')
 def results(job_id):
-    job = VideoJob.query.get_or_404(job_id)
-    shorts = VideoShort.query.filter_by(job_id=job_id).all()
+    fail_abandoned_uploads(job_id=job_id)
+    job = VideoJob.query.options(joinedload(VideoJob.shorts)).filter_by(id=job_id).first_or_404()
+    shorts = job.shorts
     return render_template('results.html', job=job, shorts=shorts)
 
 @app.route('/process/<int:job_id>')
 def process(job_id):
     job = VideoJob.query.get_or_404(job_id)
-    return render_template('process.html', job=job)
+    return render_template('process.html', job=job, queue_position=_queue_position(job_id))
 
 @app.route('/download_short/<int:short_id>')
 def download_short(short_id):
     """Download a generated short video"""
     short = VideoShort.query.get_or_404(short_id)
     
-    if not short.output_path or not os.path.exists(short.output_path):
+    # Resolve the file inside the outputs directory; safe_join is a string check, so the only stat is send_file's
+    filename = os.path.basename(short.output_path or '')
+    path = safe_join(app.config['OUTPUTS_DIR'], filename) if filename else None
+    if not path:
         flash('Video file not found', 'error')
         return redirect(url_for('view_results', job_id=short.job_id))
     
-    return send_file(short.output_path, as_attachment=True)
+    # Behind nginx, hand the transfer to an internal location so no worker streams the file
+    accel_prefix = app.config.get('ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Content-Type'] = 'video/mp4'
+        return response
+    
+    # send_file stats the file itself, so a missing file is caught here instead of checked beforehand
+    try:
+        return send_file(path, as_attachment=True, conditional=True)
+    except FileNotFoundError:
+        flash('Video file not found', 'error')
+        return redirect(url_for('view_results', job_id=short.job_id))
 
 @app.route('/upload_short/<int:short_id>', methods=['POST'])
 def upload_short(short_id):
@@ -215,17 +302,19 @@ def upload_short(short_id):
         return redirect(url_for('youtube_auth'))
     
     try:
-        # Reset status to pending if retrying
         short = VideoShort.query.get_or_404(short_id)
-        if short.upload_status and short.upload_status.value == 'failed':
-            short.upload_status = UploadStatus.PENDING
-            short.upload_error = None
-            db.session.commit()
-            flash('Retrying upload...', 'info')
+        retrying = short.upload_status == UploadStatus.FAILED
+        
+        # Claim the short before queueing it, so repeated clicks can't upload it twice
+        if not get_uploader().claim_short(short_id):
+            flash('This short is already uploading or uploaded', 'info')
+            return redirect(url_for('view_results', job_id=short.job_id))
         
-        uploader = YouTubeUploader()
-        uploader.upload_short(short_id, session.get('youtube_email'))
-        flash('Short uploaded successfully!', 'success')
+        if retrying:
+            flash('Retrying upload...', 'info')
+        future = JOB_EXECUTOR.submit(get_uploader().upload_short, short_id, session.get('youtube_email'), False)
+        future.add_done_callback(functools.partial(_release_if_cancelled, [short_id]))
+        flash('Upload queued - refresh to see its status', 'info')
     except Exception as e:
         logger.error(f"Single upload error: {e}")
         flash('Failed to upload short to YouTube', 'error')
@@ -238,23 +327,18 @@ def delete_job(job_id):
     job = VideoJob.query.get_or_404(job_id)
     
     try:
-        # Delete all associated shorts and their files
-        for short in job.shorts:
-            if short.output_path and os.path.exists(short.output_path):
-                os.remove(short.output_path)
-            if short.thumbnail_path and os.path.exists(short.thumbnail_path):
-                os.remove(short.thumbnail_path)
+        # Gather every file of the job and its shorts without loading the short rows as objects
+        short_paths = db.session.query(VideoShort.output_path, VideoShort.thumbnail_path).filter_by(job_id=job_id).all()
+        paths = [path for row in short_paths for path in row]
+        paths += [job.video_path, job.audio_path, job.transcript_path]
         
-        # Delete job files
-        if job.video_path and os.path.exists(job.video_path):
-            os.remove(job.video_path)
-        if job.audio_path and os.path.exists(job.audio_path):
-            os.remove(job.audio_path)
-        if job.transcript_path and os.path.exists(job.transcript_path):
-            os.remove(job.transcript_path)
+        for path in paths:
+            _safe_unlink(path)
         
-        # Delete from database
-        db.session.delete(job)
+        # Delete from database with one statement per table instead of one per child row
+        VideoShort.query.filter_by(job_id=job_id).delete(synchronize_session=False)
+        TranscriptSegment.query.filter_by(job_id=job_id).delete(synchronize_session=False)
+        VideoJob.query.filter_by(id=job_id).delete(synchronize_session=False)
         db.session.commit()
         
         flash('Job deleted successfully', 'success')
@@ -274,14 +358,20 @@ def youtube_disconnect():
     flash('YouTube account disconnected successfully!', 'success')
     return redirect(url_for('index'))
 
+# Fixed health payload, encoded once at import
+_HEALTH_BODY = b'{"status":"healthy","message":"YouTube Shorts Generator is running"}'
+
 @app.route('/health')
 def health_check():
     """Health check endpoint for keep-alive"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'message': 'YouTube Shorts Generator is running'
-    })
+    # Probes only need liveness; the timestamp is opt-in with ?ts=1
+    if request.args.get('ts'):
+        return jsonify({
+            'status': 'healthy',
+            'timestamp': datetime.now().isoformat(),
+            'message': 'YouTube Shorts Generator is running'
+        })
+    return Response(_HEALTH_BODY, mimetype='application/json')
 
 @app.errorhandler(404)
 def page_not_found(e):
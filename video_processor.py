@@ -224,10 +224,10 @@ class VideoProcessor:
             segments = TranscriptSegment.query.filter_by(job_id=job.id).all()
             engaging_segments = []
 
-            for segment in segments:
-                # Analyze segment with Gemini
-                analysis = self.gemini_analyzer.analyze_segment(segment.text)
+            # Analyze all segments with Gemini concurrently
+            analyses = self.gemini_analyzer.analyze_segments_batch([segment.text for segment in segments])
 
+            for segment, analysis in zip(segments, analyses):
                 # Update segment with AI scores
                 segment.engagement_score = analysis.get('engagement_score', 0.0)
                 segment.emotion_score = analysis.get('emotion_score', 0.0)
@@ -503,9 +503,12 @@ class VideoProcessor:
         """Clean up temporary files after processing"""
         try:
             # Clean up temporary audio file
-            if job.audio_path and os.path.exists(job.audio_path):
-                os.remove(job.audio_path)
-                self.logger.info(f"Cleaned up audio file: {job.audio_path}")
+            if job.audio_path:
+                try:
+                    os.remove(job.audio_path)
+                    self.logger.info(f"Cleaned up audio file: {job.audio_path}")
+                except FileNotFoundError:
+                    pass
 
             # Clean up any other temporary files in temp directory for this job
             temp_dir = 'temp'
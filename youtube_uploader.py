@@ -1,43 +1,225 @@
 import os
+import json
 import shutil
 import logging
-from googleapiclient.discovery import build
+import functools
+import threading
+import time
+import httplib2
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
 from googleapiclient.http import MediaFileUpload
-from google.auth.transport.requests import Request
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.credentials import Credentials
+from requests.adapters import HTTPAdapter
+from sqlalchemy import update
 from app import app, db
 from models import VideoShort, YouTubeCredentials, UploadStatus
 from oauth_handler import OAuthHandler
 
 logger = logging.getLogger(__name__)
 
+# Shorts of one job uploaded at the same time; keep it low to stay within YouTube's upload limits.
+# Plain threads are enough at this size: each upload is one streamed PUT that waits on the socket
+# with the GIL released, so an event loop would not upload any faster.
+UPLOAD_WORKERS = int(os.environ.get("YT_UPLOAD_WORKERS", 2))
+
+# Files up to this size go up in one multipart request, which saves the round trip that opens a
+# resumable session. googleapiclient builds that request body in memory, so the limit stays small.
+SIMPLE_UPLOAD_MAX_BYTES = 8 * 1024 * 1024
+
+# Block size for streaming a video from disk into the socket (urllib3 defaults to 16 KiB)
+UPLOAD_BLOCKSIZE = 1024 * 1024
+
+class _UploadAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections send streamed request bodies in UPLOAD_BLOCKSIZE blocks"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('blocksize', UPLOAD_BLOCKSIZE)
+        super().init_poolmanager(*args, **kwargs)
+
+# Connection pool shared by every upload session so consecutive uploads reuse open TLS connections.
+# It holds enough connections per host for every upload thread of several concurrent jobs; a full
+# pool would discard returned connections and force new handshakes on the next upload.
+_UPLOAD_ADAPTER = _UploadAdapter(pool_connections=16, pool_maxsize=max(32, 4 * UPLOAD_WORKERS))
+
+class _SessionHttp:
+    """httplib2-compatible wrapper that sends googleapiclient requests through an AuthorizedSession"""
+
+    def __init__(self, creds):
+        self.session = AuthorizedSession(creds)
+        self.session.mount('https://', _UPLOAD_ADAPTER)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        # Resumable uploads answer 308 with a Range header, which must not be followed as a redirect
+        response = self.session.request(method, uri, data=body, headers=headers,
+                                        allow_redirects=method in ("GET", "HEAD"))
+        resp = httplib2.Response({'status': response.status_code, **response.headers})
+        resp.reason = response.reason
+        return resp, response.content
+
+    def close(self):
+        # The pool is shared with later uploads, so it stays open
+        pass
+
+# Appended to descriptions shorter than 4000 characters (the surrounding blank lines are part of the text)
+_DESCRIPTION_PADDING = "\n                \n" + """🔥 Welcome to our YouTube Shorts! 🔥
+
+This amazing short video was created using advanced AI technology to bring you the most engaging and entertaining content. Our AI analyzes thousands of hours of video content to identify the most captivating moments and transform them into perfect bite-sized entertainment.
+
+✨ What makes this short special:
+• Carefully selected for maximum engagement
+• Optimized for viral potential
+• Created with cutting-edge AI technology
+• Designed to keep you entertained
+
+📱 Don't forget to:
+• LIKE this video if you enjoyed it
+• SUBSCRIBE for more amazing shorts
+• SHARE with your friends and family
+• COMMENT your thoughts below
+• TURN ON notifications for latest uploads
+
+🎯 Why you'll love our content:
+Our AI-powered system identifies the most exciting, funny, and engaging moments from longer videos and transforms them into perfect shorts. Each video is carefully crafted to maximize entertainment value while maintaining the essence of the original content.
+
+🚀 Join our community:
+We're building an amazing community of viewers who love high-quality, engaging short-form content. Every view, like, and comment helps us create even better content for you!
+
+🌟 Behind the scenes:
+This short was created using advanced machine learning algorithms that analyze viewer engagement patterns, emotional responses, and viral content characteristics. The result is content that's specifically designed to be entertaining and shareable.
+
+💡 Fun fact:
+Did you know that our AI considers over 50 different factors when selecting the perfect segments for our shorts? From emotional intensity to visual appeal, every aspect is carefully analyzed to bring you the best possible viewing experience.
+
+🎬 More content coming soon:
+We're constantly working on new and exciting shorts. Make sure to subscribe and hit the notification bell so you never miss our latest uploads!
+
+#Shorts #Viral #Entertainment #AI #Technology #Fun #Engaging #MustWatch #Trending #Popular #YouTube #Content #Amazing #Awesome #Epic #Incredible #Fantastic #Outstanding #Brilliant #Spectacular #Phenomenal #Extraordinary #Remarkable #Impressive #Stunning #Breathtaking #Captivating #Mesmerizing #Fascinating #Intriguing #Compelling #Addictive #Binge #Watch #Subscribe #Like #Share #Comment #Follow #Community #Creator #Channel #Video #Short #Clip #Moment #Highlight #Best #Top #Quality #Premium #Exclusive #Original #Creative #Innovative #Unique #Special #Limited #Rare #Collectible #Vintage #Classic #Modern #Contemporary #Fresh #New #Latest #Updated #Current #Recent #Hot #Trending #Popular #Viral #Famous #Celebrated #Acclaimed #Recognized #Awarded #Winning #Champion #Leader #Pioneer #Expert #Professional #Master #Skilled #Talented #Gifted #Exceptional #Outstanding #Superior #Excellence #Perfection #Mastery #Expertise #Knowledge #Wisdom #Intelligence #Genius #Brilliant #Smart #Clever #Witty #Funny #Hilarious #Amusing #Entertaining #Enjoyable #Pleasant #Delightful #Wonderful #Marvelous #Fantastic #Terrific #Great #Good #Nice #Cool #Awesome #Amazing #Incredible #Unbelievable #Extraordinary #Remarkable #Impressive #Stunning #Beautiful #Gorgeous #Lovely #Attractive #Appealing #Charming #Elegant #Graceful #Stylish #Fashionable #Trendy #Modern #Contemporary #Fresh #New #Latest #Updated #Current #Recent #Hot #Trending #Popular #Viral #Famous #Celebrated #Acclaimed #Recognized #Awarded #Winning #Champion #Leader #Pioneer #Expert #Professional #Master #Skilled #Talented #Gifted #Exceptional #Outstanding #Superior #Excellence #Perfection #Mastery #Expertise #Knowledge #Wisdom #Intelligence #Genius #Brilliant #Smart #Clever #Witty #Funny #Hilarious #Amusing #Entertaining #Enjoyable #Pleasant #Delightful #Wonderful #Marvelous #Fantastic #Terrific #Great #Good #Nice #Cool #Awesome #Amazing #Incredible #Unbelievable #Extraordinary #Remarkable #Impressive #Stunning #Beautiful #Gorgeous #Lovely #Attractive #Appealing #Charming #Elegant #Graceful #Stylish #Fashionable #Trendy""" + "\n                "
+
+# Repeated after the padding until the description reaches 4000 characters
+_HASHTAG_FILLER = " #Shorts #Viral #Entertainment #YouTube #MustWatch #Trending #Amazing #Awesome #Epic #Incredible #Fantastic #Outstanding #Brilliant #Spectacular #Phenomenal #Extraordinary #Remarkable #Impressive #Stunning #Breathtaking #Captivating #Mesmerizing #Fascinating #Intriguing #Compelling #Addictive #Subscribe #Like #Share #Comment #Follow #Community #Creator #Channel #Video #Short #Clip #Moment #Highlight #Best #Top #Quality #Premium #Exclusive #Original #Creative #Innovative #Unique #Special #Hot #Popular #Famous #Celebrated #Acclaimed #Expert #Professional #Master #Skilled #Talented #Gifted #Exceptional #Superior #Excellence #Perfection #Mastery #Expertise #Knowledge #Wisdom #Intelligence #Genius #Smart #Clever #Witty #Funny #Hilarious #Amusing #Entertaining #Enjoyable #Pleasant #Delightful #Wonderful #Marvelous #Terrific #Great #Good #Nice #Cool #Beautiful #Gorgeous #Lovely #Attractive #Appealing #Charming #Elegant #Graceful #Stylish #Fashionable #Modern #Contemporary #Fresh #New #Latest #Updated #Current #Recent"
+
+# Parts written by videos.insert; must name every top-level key of the request body
+_UPLOAD_PART = "snippet,status"
+
+# Status block shared by every upload; googleapiclient only serializes it, so the one dict serves all requests
+_STATUS_BLOCK = {
+    'privacyStatus': 'public',  # Can be 'private', 'unlisted', or 'public'
+    'madeForKids': False,
+    'selfDeclaredMadeForKids': False
+}
+
+# Access tokens are refreshed this long before they expire
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=5)
+
+def _utcnow():
+    """Current UTC time as a naive datetime, the form google-auth uses for expiry"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _expires_soon(creds):
+    """Whether the access token expires within CREDENTIALS_REFRESH_MARGIN; tokens without an expiry are kept"""
+    return bool(creds.expiry) and creds.expiry - _utcnow() < CREDENTIALS_REFRESH_MARGIN
+
+@functools.lru_cache(maxsize=None)
+def _youtube_discovery_doc():
+    """YouTube Data API discovery document, loaded and parsed once per process"""
+    return json.loads(discovery_cache.get_static_doc('youtube', 'v3'))
+
+# An UPLOADING claim older than this belongs to a worker that died mid-upload
+UPLOAD_CLAIM_TIMEOUT = timedelta(hours=2)
+
+def release_claimed_shorts(short_ids):
+    """Return claimed shorts whose upload never started to PENDING, e.g. when the queued upload was cancelled"""
+    with app.app_context():
+        VideoShort.query.filter(
+            VideoShort.id.in_(short_ids),
+            VideoShort.upload_status == UploadStatus.UPLOADING
+        ).update({VideoShort.upload_status: UploadStatus.PENDING}, synchronize_session=False)
+        db.session.commit()
+
+def fail_abandoned_uploads(older_than=UPLOAD_CLAIM_TIMEOUT, job_id=None):
+    """Mark UPLOADING shorts claimed longer than older_than ago as FAILED, so the retry button shows for them"""
+    with app.app_context():
+        # The claim's UPDATE refreshed updated_at, so it records when the upload was claimed
+        query = VideoShort.query.filter(
+            VideoShort.upload_status == UploadStatus.UPLOADING,
+            VideoShort.updated_at < _utcnow() - older_than
+        )
+        if job_id is not None:
+            query = query.filter(VideoShort.job_id == job_id)
+        failed = query.update({
+            VideoShort.upload_status: UploadStatus.FAILED,
+            VideoShort.upload_error: "Upload was interrupted before it finished"
+        }, synchronize_session=False)
+        db.session.commit()
+        if failed:
+            logger.warning(f"Marked {failed} interrupted upload(s) as failed")
+        return failed
+
 class YouTubeUploader:
     def __init__(self):
         self.oauth_handler = OAuthHandler()
+        # user_email -> (access token, service) so uploads reuse one client until the token rotates
+        self._services = {}
+        self._services_lock = threading.Lock()
+        # user_email -> Credentials, loaded from the database once and refreshed in place
+        self._credentials = {}
+        self._credentials_lock = threading.Lock()
+        
+    def claim_short(self, short_id):
+        """Mark a pending or failed short as uploading; False if another request already claimed or uploaded it"""
+        with app.app_context():
+            # A conditional UPDATE, so of two concurrent requests only one can win the row
+            claimed = VideoShort.query.filter(
+                VideoShort.id == short_id,
+                VideoShort.upload_status.in_((UploadStatus.PENDING, UploadStatus.FAILED))
+            ).update({VideoShort.upload_status: UploadStatus.UPLOADING, VideoShort.upload_error: None},
+                     synchronize_session=False)
+            db.session.commit()
+            return claimed == 1
+    
+    def claim_job_shorts(self, job_id):
+        """Mark a job's pending shorts as uploading in one statement and return the ids this call claimed"""
+        with app.app_context():
+            result = db.session.execute(
+                update(VideoShort)
+                .where(VideoShort.job_id == job_id, VideoShort.upload_status == UploadStatus.PENDING)
+                .values(upload_status=UploadStatus.UPLOADING)
+                .returning(VideoShort.id)
+                .execution_options(synchronize_session=False)
+            )
+            short_ids = [short_id for short_id, in result]
+            db.session.commit()
+            return short_ids
+    
+    def upload_short(self, short_id, user_email, mark_uploading=True):
+        """Upload a video short to YouTube and return whether it succeeded; callers that already claimed it pass mark_uploading=False"""
+        if mark_uploading and not self.claim_short(short_id):
+            logger.info(f"Short {short_id} is not pending or failed, skipping upload")
+            return False
         
-    def upload_short(self, short_id, user_email):
-        """Upload a video short to YouTube"""
         with app.app_context():
             short = VideoShort.query.get(short_id)
             if not short:
                 logger.error(f"Short {short_id} not found")
-                return
+                return False
+            
+            # Only the claim that set UPLOADING may upload; anything else means the short was handled elsewhere
+            if short.upload_status != UploadStatus.UPLOADING:
+                logger.info(f"Short {short_id} is {short.upload_status.value}, skipping upload")
+                return False
             
             try:
                 logger.info(f"Starting YouTube upload for short {short_id}")
                 
-                # Update status
-                short.upload_status = UploadStatus.UPLOADING
-                db.session.commit()
-                
-                # Get valid credentials
-                creds = self._get_valid_credentials(user_email)
-                if not creds:
+                # Get the user's YouTube service
+                youtube = self._get_service(user_email)
+                if not youtube:
                     raise Exception("No valid YouTube credentials found")
                 
-                # Build YouTube service
-                youtube = build('youtube', 'v3', credentials=creds)
-                
                 # Upload video
                 video_id = self._upload_video(youtube, short)
                 
@@ -50,111 +232,144 @@ class YouTubeUploader:
                 logger.info(f"Video upload completed - keeping files as requested")
                 
                 logger.info(f"Successfully uploaded short {short_id} to YouTube: {video_id}")
+                return True
                 
             except Exception as e:
                 logger.error(f"Failed to upload short {short_id}: {e}")
                 short.upload_status = UploadStatus.FAILED
                 short.upload_error = str(e)
                 db.session.commit()
+                return False
+    
+    def _get_service(self, user_email):
+        """Return a YouTube service for the user, rebuilding it only when the access token has changed"""
+        creds = self._get_valid_credentials(user_email)
+        if not creds:
+            return None
+        
+        with self._services_lock:
+            cached = self._services.get(user_email)
+            if cached and cached[0] == creds.token:
+                return cached[1]
+            
+            # Requests go through the pooled session transport, which is safe to share between upload threads
+            youtube = build_from_document(_youtube_discovery_doc(), http=_SessionHttp(creds))
+            self._services[user_email] = (creds.token, youtube)
+            return youtube
     
     def _get_valid_credentials(self, user_email):
-        """Get valid YouTube credentials, refreshing if necessary"""
+        """Get valid YouTube credentials from the in-memory cache, refreshing shortly before they expire"""
         try:
-            db_creds = YouTubeCredentials.query.filter_by(user_email=user_email).first()
-            if not db_creds:
-                return None
-            
-            # Create OAuth2 credentials object
-            creds = Credentials(
-                token=db_creds.access_token,
-                refresh_token=db_creds.refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=self.oauth_handler.client_id,
-                client_secret=self.oauth_handler.client_secret
-            )
-            
-            # Refresh if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
+            # One lock for load and refresh, so concurrent uploads never refresh the same token twice
+            with self._credentials_lock:
+                creds = self._credentials.get(user_email)
+                if creds is None:
+                    creds = self._load_credentials(user_email)
+                    if not creds:
+                        return None
+                    self._credentials[user_email] = creds
                 
-                # Update database with new token
-                db_creds.access_token = creds.token
-                if creds.expiry:
-                    db_creds.token_expires = creds.expiry
-                db.session.commit()
+                # Refresh ahead of expiry so a resumable upload never starts on a token about to lapse
+                if creds.refresh_token and _expires_soon(creds):
+                    # Another worker process may already have stored a fresh token
+                    stored = self._load_credentials(user_email)
+                    if not stored:
+                        # The user's tokens were revoked
+                        self._credentials.pop(user_email, None)
+                        return None
+                    if not _expires_soon(stored):
+                        self._credentials[user_email] = stored
+                        return stored
+                    
+                    try:
+                        creds.refresh(Request())
+                    except Exception:
+                        # The stored grant may have been replaced or revoked; reload from the database next time
+                        self._credentials.pop(user_email, None)
+                        raise
+                    
+                    # Compare against the token the database held before this refresh started
+                    if self._store_refreshed_credentials(user_email, creds, stored.token):
+                        logger.info(f"Refreshed credentials for {user_email}")
+                    else:
+                        logger.info(f"Refreshed credentials for {user_email}; another worker already stored newer tokens")
                 
-                logger.info(f"Refreshed credentials for {user_email}")
-            
-            return creds
+                return creds
             
         except Exception as e:
             logger.error(f"Failed to get valid credentials: {e}")
             return None
     
+    def _load_credentials(self, user_email):
+        """Build OAuth2 credentials from the stored tokens"""
+        db_creds = YouTubeCredentials.query.filter_by(user_email=user_email).first()
+        if not db_creds:
+            return None
+        
+        # google-auth compares expiry against naive UTC datetimes
+        expiry = db_creds.token_expires
+        if expiry and expiry.tzinfo:
+            expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        # Create OAuth2 credentials object
+        return Credentials(
+            token=db_creds.access_token,
+            refresh_token=db_creds.refresh_token,
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=self.oauth_handler.client_id,
+            client_secret=self.oauth_handler.client_secret,
+            expiry=expiry
+        )
+    
+    def _store_refreshed_credentials(self, user_email, creds, previous_token):
+        """Write refreshed tokens back only if the row still holds previous_token; False if another refresh got there first"""
+        values = {
+            YouTubeCredentials.access_token: creds.token,
+            YouTubeCredentials.refresh_token: creds.refresh_token,
+        }
+        if creds.expiry:
+            values[YouTubeCredentials.token_expires] = creds.expiry
+        # Compare-and-swap on the old token, so of several racing refreshers only the first one writes
+        updated = YouTubeCredentials.query.filter(
+            YouTubeCredentials.user_email == user_email,
+            YouTubeCredentials.access_token == previous_token
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        return updated == 1
+    
+    def forget_credentials(self, user_email):
+        """Drop cached credentials so the next upload reloads them, e.g. after the user re-authorizes"""
+        # Only this process's cache; other gunicorn workers reload once their copy is close to expiry
+        with self._credentials_lock:
+            self._credentials.pop(user_email, None)
+    
     def _upload_video(self, youtube, short):
         """Upload video to YouTube"""
         try:
-            if not short.output_path or not os.path.exists(short.output_path):
+            # One stat both checks the file exists and sizes it for choosing the upload type
+            try:
+                file_size = os.stat(short.output_path).st_size if short.output_path else None
+            except FileNotFoundError:
+                file_size = None
+            if file_size is None:
                 raise Exception("Video file not found")
             
             # Ensure description is between 4000-4500 characters
             description = short.description or "Generated YouTube Short"
             
-            # If description is too short, pad it to reach 4000 characters
+            # If description is too short, add the engaging padding
             if len(description) < 4000:
-                base_content = description
-                
-                # Add engaging content to reach 4000+ characters
-                padding_content = """
-                
-🔥 Welcome to our YouTube Shorts! 🔥
-
-This amazing short video was created using advanced AI technology to bring you the most engaging and entertaining content. Our AI analyzes thousands of hours of video content to identify the most captivating moments and transform them into perfect bite-sized entertainment.
-
-✨ What makes this short special:
-• Carefully selected for maximum engagement
-• Optimized for viral potential
-• Created with cutting-edge AI technology
-• Designed to keep you entertained
-
-📱 Don't forget to:
-• LIKE this video if you enjoyed it
-• SUBSCRIBE for more amazing shorts
-• SHARE with your friends and family
-• COMMENT your thoughts below
-• TURN ON notifications for latest uploads
-
-🎯 Why you'll love our content:
-Our AI-powered system identifies the most exciting, funny, and engaging moments from longer videos and transforms them into perfect shorts. Each video is carefully crafted to maximize entertainment value while maintaining the essence of the original content.
-
-🚀 Join our community:
-We're building an amazing community of viewers who love high-quality, engaging short-form content. Every view, like, and comment helps us create even better content for you!
-
-🌟 Behind the scenes:
-This short was created using advanced machine learning algorithms that analyze viewer engagement patterns, emotional responses, and viral content characteristics. The result is content that's specifically designed to be entertaining and shareable.
-
-💡 Fun fact:
-Did you know that our AI considers over 50 different factors when selecting the perfect segments for our shorts? From emotional intensity to visual appeal, every aspect is carefully analyzed to bring you the best possible viewing experience.
-
-🎬 More content coming soon:
-We're constantly working on new and exciting shorts. Make sure to subscribe and hit the notification bell so you never miss our latest uploads!
-
-#Shorts #Viral #Entertainment #AI #Technology #Fun #Engaging #MustWatch #Trending #Popular #YouTube #Content #Amazing #Awesome #Epic #Incredible #Fantastic #Outstanding #Brilliant #Spectacular #Phenomenal #Extraordinary #Remarkable #Impressive #Stunning #Breathtaking #Captivating #Mesmerizing #Fascinating #Intriguing #Compelling #Addictive #Binge #Watch #Subscribe #Like #Share #Comment #Follow #Community #Creator #Channel #Video #Short #Clip #Moment #Highlight #Best #Top #Quality #Premium #Exclusive #Original #Creative #Innovative #Unique #Special #Limited #Rare #Collectible #Vintage #Classic #Modern #Contemporary #Fresh #New #Latest #Updated #Current #Recent #Hot #Trending #Popular #Viral #Famous #Celebrated #Acclaimed #Recognized #Awarded #Winning #Champion #Leader #Pioneer #Expert #Professional #Master #Skilled #Talented #Gifted #Exceptional #Outstanding #Superior #Excellence #Perfection #Mastery #Expertise #Knowledge #Wisdom #Intelligence #Genius #Brilliant #Smart #Clever #Witty #Funny #Hilarious #Amusing #Entertaining #Enjoyable #Pleasant #Delightful #Wonderful #Marvelous #Fantastic #Terrific #Great #Good #Nice #Cool #Awesome #Amazing #Incredible #Unbelievable #Extraordinary #Remarkable #Impressive #Stunning #Beautiful #Gorgeous #Lovely #Attractive #Appealing #Charming #Elegant #Graceful #Stylish #Fashionable #Trendy #Modern #Contemporary #Fresh #New #Latest #Updated #Current #Recent #Hot #Trending #Popular #Viral #Famous #Celebrated #Acclaimed #Recognized #Awarded #Winning #Champion #Leader #Pioneer #Expert #Professional #Master #Skilled #Talented #Gifted #Exceptional #Outstanding #Superior #Excellence #Perfection #Mastery #Expertise #Knowledge #Wisdom #Intelligence #Genius #Brilliant #Smart #Clever #Witty #Funny #Hilarious #Amusing #Entertaining #Enjoyable #Pleasant #Delightful #Wonderful #Marvelous #Fantastic #Terrific #Great #Good #Nice #Cool #Awesome #Amazing #Incredible #Unbelievable #Extraordinary #Remarkable #Impressive #Stunning #Beautiful #Gorgeous #Lovely #Attractive #Appealing #Charming #Elegant #Graceful #Stylish #Fashionable #Trendy
-                """
-                
-                description = base_content + padding_content
+                description += _DESCRIPTION_PADDING
+            
+            # Top up with as many hashtag blocks as needed to reach 4000 characters
+            if len(description) < 4000:
+                needed = 4000 - len(description)
+                description += _HASHTAG_FILLER * -(-needed // len(_HASHTAG_FILLER))
             
             # Trim to 4500 characters max if too long
             if len(description) > 4500:
                 description = description[:4497] + "..."
             
-            # Ensure it's at least 4000 characters
-            while len(description) < 4000:
-                description += " #Shorts #Viral #Entertainment #YouTube #MustWatch #Trending #Amazing #Awesome #Epic #Incredible #Fantastic #Outstanding #Brilliant #Spectacular #Phenomenal #Extraordinary #Remarkable #Impressive #Stunning #Breathtaking #Captivating #Mesmerizing #Fascinating #Intriguing #Compelling #Addictive #Subscribe #Like #Share #Comment #Follow #Community #Creator #Channel #Video #Short #Clip #Moment #Highlight #Best #Top #Quality #Premium #Exclusive #Original #Creative #Innovative #Unique #Special #Hot #Popular #Famous #Celebrated #Acclaimed #Expert #Professional #Master #Skilled #Talented #Gifted #Exceptional #Superior #Excellence #Perfection #Mastery #Expertise #Knowledge #Wisdom #Intelligence #Genius #Smart #Clever #Witty #Funny #Hilarious #Amusing #Entertaining #Enjoyable #Pleasant #Delightful #Wonderful #Marvelous #Terrific #Great #Good #Nice #Cool #Beautiful #Gorgeous #Lovely #Attractive #Appealing #Charming #Elegant #Graceful #Stylish #Fashionable #Modern #Contemporary #Fresh #New #Latest #Updated #Current #Recent"
-                if len(description) > 4500:
-                    description = description[:4497] + "..."
-                    break
-            
             logger.info(f"Video description length: {len(description)} characters")
             
             # Prepare video metadata
@@ -167,34 +382,39 @@ We're constantly working on new and exciting shorts. Make sure to subscribe and
                     'defaultLanguage': 'en',
                     'defaultAudioLanguage': 'en'
                 },
-                'status': {
-                    'privacyStatus': 'public',  # Can be 'private', 'unlisted', or 'public'
-                    'madeForKids': False,
-                    'selfDeclaredMadeForKids': False
-                }
+                'status': _STATUS_BLOCK
             }
             
-            # Create media upload object
+            # Create media upload object; larger files stream through a resumable session
+            resumable = file_size > SIMPLE_UPLOAD_MAX_BYTES
             media = MediaFileUpload(
                 short.output_path,
                 chunksize=-1,
-                resumable=True,
+                resumable=resumable,
                 mimetype='video/mp4'
             )
             
             # Insert video
             insert_request = youtube.videos().insert(
-                part=','.join(body.keys()),
+                part=_UPLOAD_PART,
                 body=body,
                 media_body=media
             )
             
             # Execute upload
-            response = None
-            while response is None:
-                status, response = insert_request.next_chunk()
-                if status:
-                    logger.info(f"Upload progress {int(status.progress() * 100)}%")
+            if resumable:
+                response = None
+                last_percent = 0
+                while response is None:
+                    status, response = insert_request.next_chunk()
+                    if status:
+                        # Log in steps of at least 10% rather than once per chunk
+                        percent = int(status.progress() * 100)
+                        if percent >= last_percent + 10:
+                            last_percent = percent
+                            logger.info(f"Upload progress {percent}%")
+            else:
+                response = insert_request.execute()
             
             if 'id' not in response:
                 raise Exception(f"Upload failed: {response}")
@@ -215,11 +435,12 @@ We're constantly working on new and exciting shorts. Make sure to subscribe and
             
             # Check if this was the last short for the job
             job = short.job
-            remaining_shorts = VideoShort.query.filter_by(job_id=job.id).filter(
+            # Stops at the first unfinished short instead of counting them all
+            remaining_shorts = db.session.query(VideoShort.query.filter_by(job_id=job.id).filter(
                 VideoShort.upload_status != UploadStatus.COMPLETED
-            ).count()
+            ).exists()).scalar()
             
-            if remaining_shorts == 0:
+            if not remaining_shorts:
                 # All shorts uploaded, but keep all files
                 logger.info(f"All shorts uploaded for job {job.id} - keeping all files")
                 
@@ -246,24 +467,30 @@ We're constantly working on new and exciting shorts. Make sure to subscribe and
         try:
             directories_to_check = ['temp']  # Only check temp directory for truly temporary files
             
+            current_time = time.time()
             for dir_name in directories_to_check:
-                if os.path.exists(dir_name):
-                    import time
-                    current_time = time.time()
-                    for filename in os.listdir(dir_name):
-                        file_path = os.path.join(dir_name, filename)
-                        if os.path.isfile(file_path):
-                            file_age = current_time - os.path.getmtime(file_path)
+                try:
+                    entries = os.scandir(dir_name)
+                except FileNotFoundError:
+                    continue
+                # Directory entries already carry the file type, so only the age check needs a stat
+                with entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            file_age = current_time - entry.stat(follow_symlinks=False).st_mtime
                             # Only remove files older than 24 hours (86400 seconds)
                             if file_age > 86400:
-                                os.remove(file_path)
-                                logger.info(f"Removed old temporary file: {file_path}")
+                                try:
+                                    os.unlink(entry.path)
+                                except FileNotFoundError:
+                                    continue
+                                logger.info(f"Removed old temporary file: {entry.path}")
                         
         except Exception as e:
             logger.error(f"Error during temp file cleanup: {e}")
     
-    def upload_shorts_for_job(self, job_id, user_email):
-        """Upload all shorts for a job"""
+    def upload_shorts_for_job(self, job_id, user_email, short_ids=None):
+        """Upload all shorts for a job; short_ids are shorts the caller already claimed with claim_job_shorts"""
         with app.app_context():
             from models import VideoJob, VideoShort
             
@@ -272,30 +499,40 @@ We're constantly working on new and exciting shorts. Make sure to subscribe and
                 logger.error(f"Job {job_id} not found")
                 return False
             
-            # Get all shorts for this job that haven't been uploaded yet
-            shorts = VideoShort.query.filter_by(
-                job_id=job_id,
-                upload_status=UploadStatus.PENDING
-            ).all()
+            # Claim the shorts that haven't been uploaded yet; each upload thread loads its own row
+            if short_ids is None:
+                short_ids = self.claim_job_shorts(job_id)
             
-            if not shorts:
+            if not short_ids:
                 logger.info(f"No shorts to upload for job {job_id}")
                 return True
             
-            logger.info(f"Starting upload of {len(shorts)} shorts for job {job_id}")
+            logger.info(f"Starting upload of {len(short_ids)} shorts for job {job_id}")
             
+            # Uploads are network-bound, so overlap them; upload_short opens its own app context and session per thread
             success_count = 0
-            for short in shorts:
-                try:
-                    self.upload_short(short.id, user_email)
-                    success_count += 1
-                    logger.info(f"Successfully uploaded short {short.id}")
-                except Exception as e:
-                    logger.error(f"Failed to upload short {short.id}: {e}")
-                    # Update short with error status
-                    short.upload_status = UploadStatus.FAILED
-                    short.upload_error = str(e)
-                    db.session.commit()
+            failed_ids = []
+            with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='ytupload') as executor:
+                futures = {executor.submit(self.upload_short, short_id, user_email, False): short_id for short_id in short_ids}
+                for future in as_completed(futures):
+                    short_id = futures[future]
+                    try:
+                        # upload_short records FAILED itself when the upload goes wrong
+                        if future.result():
+                            success_count += 1
+                            logger.info(f"Successfully uploaded short {short_id}")
+                    except Exception as e:
+                        # Its own status update failed, so the short may still read UPLOADING
+                        logger.error(f"Failed to upload short {short_id}: {e}")
+                        failed_ids.append(short_id)
+            
+            if failed_ids:
+                # One statement for all of them, leaving any status that did get written untouched
+                VideoShort.query.filter(
+                    VideoShort.id.in_(failed_ids),
+                    VideoShort.upload_status == UploadStatus.UPLOADING
+                ).update({VideoShort.upload_status: UploadStatus.FAILED}, synchronize_session=False)
+                db.session.commit()
             
-            logger.info(f"Upload completed: {success_count}/{len(shorts)} shorts uploaded successfully")
-            return success_count == len(shorts)
+            logger.info(f"Upload completed: {success_count}/{len(short_ids)} shorts uploaded successfully")
+            return success_count == len(short_ids)